@@ -1,9 +1,16 @@
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import (Column, Integer, String, DateTime, ForeignKey, Boolean, CheckConstraint, Index, UniqueConstraint,
+                        JSON, Text, func)
 from sqlalchemy.orm import declarative_base, relationship
 
+# Схема базы меняется только миграциями (migrations/versions): alembic upgrade head.
 Base = declarative_base()
 
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
 class User(Base):
     # Модель пользователя.
     __tablename__ = "users"
@@ -16,11 +23,29 @@ class User(Base):
 
     created_events = relationship("Event", back_populates="owner")
     tickets = relationship("Ticket", back_populates="participant")
+    # Перенесённые в архив мероприятия и билеты; только для чтения.
+    archived_events = relationship("ArchivedEvent", viewonly=True)
+    archived_tickets = relationship("ArchivedTicket", viewonly=True)
+
+    @property
+    def all_created_events(self) -> list:
+        # Созданные мероприятия вместе с архивными (для schemas.User), загружаются профилем full.
+        return [*self.created_events, *self.archived_events]
+
+    @property
+    def all_tickets(self) -> list:
+        return [*self.tickets, *self.archived_tickets]
 
 
 class Event(Base):
     # Модель мероприятия.
     __tablename__ = "events"
+    __table_args__ = (
+        CheckConstraint("tickets_sold >= 0 AND (capacity IS NULL OR tickets_sold <= capacity)",
+                        name="ck_events_tickets_sold"),
+        Index("ix_events_start_time_id", "start_time", "id"),
+        Index("ix_events_owner_id_start_time", "owner_id", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
@@ -28,18 +53,94 @@ class Event(Base):
     start_time = Column(DateTime(timezone=True))
     location = Column(String, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Количество мест (None — без ограничения) и счётчик выданных билетов.
+    capacity = Column(Integer, nullable=True)
+    tickets_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    # Версия для ETag: увеличивается при изменении мероприятия и при выдаче или возврате билета.
+    # updated_at обновляется при любом UPDATE строки.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow,
+                        server_default=func.now())
 
     owner = relationship("User", back_populates="created_events")
-    tickets = relationship("Ticket", back_populates="event", cascade="all, delete-orphan")
+    tickets = relationship("Ticket", back_populates="event", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Ticket(Base):
     # Модель билета.
     __tablename__ = "tickets"
+    __table_args__ = (
+        UniqueConstraint("event_id", "participant_id", name="uq_tickets_event_participant"),
+        Index("ix_tickets_participant_id", "participant_id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id", ondelete="CASCADE"), nullable=False)
     participant_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     event = relationship("Event", back_populates="tickets")
-    participant = relationship("User", back_populates="tickets")
\ No newline at end of file
+    participant = relationship("User", back_populates="tickets")
+
+
+class ArchivedEvent(Base):
+    # Архив прошедших мероприятий: их переносит задача archive_events, чтобы таблица events
+    # и её индексы оставались небольшими. ID сохраняются, поэтому они не пересекаются с events.
+    __tablename__ = "archived_events"
+    __table_args__ = (
+        Index("ix_archived_events_start_time_id", "start_time", "id"),
+        Index("ix_archived_events_owner_id_start_time", "owner_id", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    start_time = Column(DateTime(timezone=True))
+    location = Column(String, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"))
+    capacity = Column(Integer, nullable=True)
+    tickets_sold = Column(Integer, nullable=False, default=0, server_default="0")
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    archived_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    owner = relationship("User")
+    tickets = relationship("ArchivedTicket", back_populates="event", passive_deletes=True)
+
+
+class ArchivedTicket(Base):
+    # Билеты архивных мероприятий.
+    __tablename__ = "archived_tickets"
+    __table_args__ = (
+        Index("ix_archived_tickets_event_id", "event_id"),
+        Index("ix_archived_tickets_participant_id", "participant_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    event_id = Column(Integer, ForeignKey("archived_events.id", ondelete="CASCADE"), nullable=False)
+    participant_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    event = relationship("ArchivedEvent", back_populates="tickets")
+    participant = relationship("User")
+
+
+class Job(Base):
+    # Фоновая задача (блокировка, удаление мероприятий и т. п.), её выполняет app.service.jobs.
+    # status: queued → running → done | failed; при ошибке задача возвращается в queued до max_attempts.
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    run_after = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,30 +1,79 @@
 # app/main.py
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app.db.database import engine
-from app.db.models import Base
+from app.config import settings
+from app.db.database import dispose_engines, engine, read_engine
+from app.service.event import event_cache
+from app.service.hashing import password_hasher
+from app.service.jobs import job_worker
+from app.service.live import live_hub
+from app.service import telemetry
+from app.service.rate_limit import rate_limit_backend
 from app.routes.user import router as user_router
 from app.routes.event import router as event_router
 from app.routes.ticket import router as ticket_router
 from app.routes.auth import router as auth_router
 from app.routes.admin import router as admin_router
+from app.routes.health import router as health_router
+from app.routes.metrics import router as metrics_router
+
+# Движки, кеши и пулы создаются при импорте, но ни соединений, ни процессов, ни задач
+# до старта lifespan не открывают: модуль можно загрузить в мастере gunicorn до fork.
+
+telemetry.instrument_engine(engine, "primary")
+if read_engine is not engine:
+    telemetry.instrument_engine(read_engine, "replica")
+
+
+async def begin_draining(app: FastAPI):
+    # Начало остановки, до ожидания незавершённых запросов: /health/ready отвечает 503,
+    # потоки подписок закрываются, чтобы не держать воркер до таймаута. Вызывается повторно из lifespan.
+    app.state.ready = False
+    await live_hub.close()
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ресурсы процесса: запускаются в каждом воркере после fork и закрываются при его остановке.
+    telemetry.record_pool_capacity(engine, "primary")
+    if read_engine is not engine:
+        telemetry.record_pool_capacity(read_engine, "replica")
+    await live_hub.start()
+    if settings.jobs_worker_enabled:
+        if settings.archive_enabled:
+            job_worker.schedule("archive_events", interval=settings.archive_interval)
+        job_worker.start()
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        await begin_draining(app)
+        await job_worker.stop()
+        password_hasher.shutdown()
+        await event_cache.close()
+        await rate_limit_backend.close()
+        await dispose_engines()
+        telemetry.mark_process_dead(os.getpid())
 
 
-async def create_db_and_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.state.ready = False
+    app.add_middleware(telemetry.MetricsMiddleware)
 
-@app.on_event("startup")
-async def on_startup():
-    await create_db_and_tables()
+    app.include_router(user_router)
+    app.include_router(event_router)
+    app.include_router(ticket_router)
+    app.include_router(auth_router)
+    app.include_router(admin_router)
+    app.include_router(health_router)
+    if settings.metrics_enabled:
+        app.include_router(metrics_router)
+    return app
 
 
-app.include_router(user_router)
-app.include_router(event_router)
-app.include_router(ticket_router)
-app.include_router(auth_router)
-app.include_router(admin_router)
+app = create_app()
@@ -1,30 +1,60 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, status, Depends, Body, Query
+from fastapi import APIRouter, status, Depends, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db import models
 from app.db.database import get_db
 from app.schemas import schemas
-from app.service.security import check_jwt
 import app.service.event as event_service
 import app.service.user as user_service
 import app.service.auth as auth_service
+import app.service.metrics as metrics_service
+import app.service.export as export_service
+import app.service.jobs as jobs_service
+from app.config import settings
+from app.service import rate_limit
 
-router = APIRouter(prefix="/admin",tags=["Admin"])
+router = APIRouter(prefix="/admin", tags=["Admin"],
+                   dependencies=[Depends(rate_limit.limit_per_ip("admin", settings.rate_limit_admin))])
 
 
-@router.delete("/events/{event_id}", status_code=status.HTTP_200_OK,
+@router.delete("/events/{event_id}", status_code=status.HTTP_202_ACCEPTED, response_model=schemas.Job,
     summary="Удаление мероприятия администратором",
-    description="Удаляет мероприятие по его ID. Доступно только для администраторов.")
-async def delete_event(event_id: int, db: AsyncSession = Depends(get_db),admin_id = Depends(check_jwt)):
-    await event_service.delete_event_by_admin(db=db, event_id=event_id, user_id=admin_id)
+    description="Ставит удаление мероприятия по его ID в очередь и возвращает задачу; её статус — в /admin/jobs/{job_id}. Доступно только для администраторов.")
+async def delete_event(event_id: int, db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)):
+    job = await event_service.request_event_deletion(db=db, event_id=event_id, admin_user=admin)
+    return job
 
-@router.delete("/users/{user_id}/ban", response_model=schemas.User,
+@router.post("/events/purge", status_code=status.HTTP_202_ACCEPTED, response_model=schemas.Job,
+    summary="Удаление прошедших мероприятий",
+    description="Ставит в очередь удаление всех мероприятий, начавшихся раньше before (по умолчанию — раньше текущего момента), вместе с билетами. Доступно только для администраторов.")
+async def purge_past_events(before: Optional[datetime] = Query(None), db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)):
+    job = await event_service.request_past_events_purge(db=db, before=before or datetime.now(timezone.utc), admin_user=admin)
+    return job
+
+@router.delete("/users/{user_id}/ban", status_code=status.HTTP_202_ACCEPTED, response_model=schemas.Job,
     summary="Блокировка пользователя администратором",
-    description="Блокирует пользователя по его ID. Доступно только для администраторов.")
-async def ban_user_by_admin(user_id: int,db: AsyncSession = Depends(get_db), admin_id: int = Depends(check_jwt)):
-    banned_user = await user_service.ban_user(db=db,user_id_to_ban=user_id,admin_id = admin_id)
-    return banned_user
+    description="Ставит блокировку пользователя по его ID и удаление его мероприятий в очередь и возвращает задачу. Доступно только для администраторов.")
+async def ban_user_by_admin(user_id: int,db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)):
+    job = await user_service.ban_user(db=db,user_id_to_ban=user_id,admin_user=admin)
+    return job
+
+@router.post("/users/ban", status_code=status.HTTP_202_ACCEPTED, response_model=schemas.Job,
+    summary="Массовая блокировка пользователей",
+    description="Ставит в очередь блокировку пользователей по списку ID с удалением их мероприятий вместе с билетами. Результат (banned_users, deleted_events, deleted_tickets, not_found) появится в result задачи. Доступно только для администраторов.")
+async def ban_users_by_admin(db: AsyncSession = Depends(get_db), schema: schemas.BanUsersRequest = Body(...), admin: models.User = Depends(user_service.get_current_admin)):
+    job = await user_service.ban_users(db=db, user_ids=schema.user_ids, admin_user=admin)
+    return job
+
+@router.get("/jobs/{job_id}", response_model=schemas.Job,
+    summary="Статус фоновой задачи",
+    description="Возвращает статус задачи (queued, running, done, failed), число попыток, результат или ошибку. Доступно только для администраторов.")
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)):
+    job = await jobs_service.get_job(db, job_id=job_id)
+    return job
 
 @router.post("/register", status_code=status.HTTP_200_OK, response_model=schemas.User,
     summary="Регистрация нового администратора",
@@ -37,6 +67,45 @@ async def register(db: AsyncSession = Depends(get_db), schema: schemas.UserAuth
 @router.get("/users", status_code=status.HTTP_200_OK,response_model=List[schemas.UserAdminView],
     summary="Получить всех пользователей",
     description="Возвращает всех пользователей")
-async def register(db: AsyncSession = Depends(get_db),admin_id: int = Depends(check_jwt)) -> List[schemas.UserAdminView]:
-    users = await user_service.get_all_users(db,admin_id)
-    return users
\ No newline at end of file
+async def register(db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)) -> List[schemas.UserAdminView]:
+    users = await user_service.get_all_users(db)
+    return users
+
+@router.get("/metrics", status_code=status.HTTP_200_OK,
+    summary="Внутренние метрики",
+    description="Возвращает метрики текущего процесса: пул хеширования паролей (задержка, ожидание в очереди, отказы).")
+async def get_metrics(admin: models.User = Depends(user_service.get_current_admin)) -> dict:
+    return metrics_service.get_runtime_metrics()
+
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+@router.get("/export/events",
+    summary="Выгрузка всех мероприятий",
+    description="Потоково выгружает все мероприятия в NDJSON или CSV по возрастанию ID. Чтобы продолжить прерванную выгрузку, передайте последний полученный ID в after_id.")
+async def export_events(export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"), after_id: int = Query(0, ge=0),
+                        db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)):
+    # Сессия проверки прав закрывается до начала потока: зависимости с yield завершаются только
+    # после ответа, и соединение основной базы простаивало бы в транзакции всю выгрузку.
+    await db.close()
+    return StreamingResponse(
+        export_service.export_events(export_format, after_id=after_id),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="events.{export_format}"'},
+    )
+
+@router.get("/export/events/{event_id}/attendees",
+    summary="Выгрузка участников мероприятия",
+    description="Потоково выгружает участников мероприятия в NDJSON или CSV по возрастанию ID билета. Чтобы продолжить прерванную выгрузку, передайте последний полученный ticket_id в after_id.")
+async def export_attendees(event_id: int, export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"), after_id: int = Query(0, ge=0),
+                           db: AsyncSession = Depends(get_db), admin: models.User = Depends(user_service.get_current_admin)):
+    event_model = await event_service.find_event_model(db, event_id=event_id)
+    if not event_model:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие не найдено.")
+    ticket_model = models.Ticket if event_model is models.Event else models.ArchivedTicket
+    await db.close()
+    return StreamingResponse(
+        export_service.export_attendees(event_id, export_format, after_id=after_id, model=ticket_model),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="event-{event_id}-attendees.{export_format}"'},
+    )
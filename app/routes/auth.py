@@ -4,8 +4,11 @@ import app.service.auth as auth_service
 
 from app.db.database import get_db
 from app.schemas import schemas
+from app.config import settings
+from app.service import rate_limit
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"],
+                   dependencies=[Depends(rate_limit.limit_per_ip("auth", settings.rate_limit_auth))])
 
 @router.post("/register", status_code=status.HTTP_200_OK, response_model=schemas.User,
     summary="Регистрация нового пользователя",
@@ -17,8 +20,9 @@ async def register(db: AsyncSession = Depends(get_db), schema: schemas.UserAuth
 
 @router.post("/login", response_model=schemas.Token,
     summary="Авторизация пользователя",
-    description="Авторизирует пользователя и возвращает токен доступа.")
+    description="Авторизирует пользователя и возвращает токен доступа. Число попыток входа ограничено по IP-адресу и по имени пользователя.")
 async def login(db: AsyncSession = Depends(get_db), schema: schemas.UserAuth = Body(...)) -> schemas.Token:
-
+    # Лимит на аккаунт проверяется до обращения к базе и bcrypt.
+    await rate_limit.limit_login_attempts(schema.username)
     user = await auth_service.authenticate_user(db, schema)
     return await auth_service.create_user_token(user.id)
\ No newline at end of file
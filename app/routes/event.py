@@ -1,15 +1,23 @@
 # app/routers/events.py
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, status, Depends, Body, HTTPException
+from fastapi import APIRouter, status, Depends, Body, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
-from app.schemas import schemas
+from app.db.database import get_db, get_read_db
+from app.schemas import adapters, schemas
+from app.service import conditional
 from app.service import event as event_service
+from app.service import ticket as ticket_service
+from app.service.live import live_hub
 from app.service.security import check_jwt
+from app.config import settings
+from app.service import rate_limit
 
-router = APIRouter(prefix="/events", tags=["Events"])
+router = APIRouter(prefix="/events", tags=["Events"],
+                   dependencies=[Depends(rate_limit.limit_per_ip("events", settings.rate_limit_events))])
 
 @router.post("", response_model=schemas.Event, status_code=status.HTTP_200_OK,
     summary="Создание нового мероприятия",
@@ -27,28 +35,86 @@ async def update_event(event_id: int, db: AsyncSession = Depends(get_db), schema
     updated_event = await event_service.update_event(db=db, event_id=event_id, schema=schema, user_id=user_id)
     return updated_event
 
-@router.get("/active", response_model=List[schemas.EventShort], status_code=status.HTTP_200_OK,
+@router.get("/active", response_model=schemas.EventPage, status_code=status.HTTP_200_OK,
     summary="Получение будущих мероприятий",
-    description="Получение списка всех будущих мероприятий.")
-async def get_active_events(db: AsyncSession = Depends(get_db),user_id: int = Depends(check_jwt)):
+    description="Получение страницы будущих мероприятий, ближайшие первыми. Для следующей страницы передайте next_cursor из ответа в параметр cursor. Поддерживает If-None-Match: если страница не изменилась, возвращается 304.")
+async def get_active_events(request: Request, db: AsyncSession = Depends(get_read_db), user_id: int = Depends(check_jwt),
+                            limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = Query(None),
+                            location: Optional[str] = Query(None), owner_id: Optional[int] = Query(None),
+                            start_from: Optional[datetime] = Query(None), start_to: Optional[datetime] = Query(None)):
 
-    event = await event_service.get_all_active_events(db=db)
-    return event
+    # Версия страницы считается одним агрегатом; полная выборка нужна, только если она изменилась.
+    count, ids, versions, updated_at = await event_service.get_active_events_version(
+        db=db, limit=limit, cursor=cursor, location=location, owner_id=owner_id, start_from=start_from, start_to=start_to)
+    etag = conditional.make_etag("events/active", request.url.query, count, ids, versions, updated_at)
+    headers = conditional.validator_headers(etag, updated_at)
+    if conditional.etag_matches(request, etag):
+        return conditional.not_modified(headers)
+
+    events, next_cursor = await event_service.get_all_active_events(db=db, limit=limit, cursor=cursor, location=location,
+                                                                     owner_id=owner_id, start_from=start_from, start_to=start_to)
+    return Response(content=adapters.dump_json(adapters.EVENT_PAGE, {"items": events, "next_cursor": next_cursor}),
+                    media_type="application/json", headers=headers)
 
-@router.get("/history", response_model=List[schemas.EventShort], status_code=status.HTTP_200_OK,
+@router.get("/history", response_model=schemas.EventPage, status_code=status.HTTP_200_OK,
     summary="Получение прошедших мероприятия",
-    description="Получение списка всех прошедших мероприятий(Дата начала уже прошла).")
-async def get_old_events(db: AsyncSession = Depends(get_db), user_id: int = Depends(check_jwt)):
+    description="Получение страницы прошедших мероприятий(Дата начала уже прошла), последние первыми. Для следующей страницы передайте next_cursor из ответа в параметр cursor.")
+async def get_old_events(db: AsyncSession = Depends(get_read_db), user_id: int = Depends(check_jwt),
+                         limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = Query(None),
+                         location: Optional[str] = Query(None), owner_id: Optional[int] = Query(None),
+                         start_from: Optional[datetime] = Query(None), start_to: Optional[datetime] = Query(None)):
 
-    event = await event_service.get_old_events(db=db)
-    return event
+    events, next_cursor = await event_service.get_old_events(db=db, limit=limit, cursor=cursor, location=location,
+                                                              owner_id=owner_id, start_from=start_from, start_to=start_to)
+    return Response(content=adapters.dump_json(adapters.EVENT_PAGE, {"items": events, "next_cursor": next_cursor}),
+                    media_type="application/json")
+
+@router.get("/search", response_model=schemas.EventPage, status_code=status.HTTP_200_OK,
+    summary="Поиск мероприятий",
+    description="Полнотекстовый поиск по названию, описанию и месту проведения, самые релевантные первыми. Поддерживает \"фразы\" и -исключения. По умолчанию ищет только будущие мероприятия.")
+async def search_events(q: str = Query(..., min_length=2, max_length=200), db: AsyncSession = Depends(get_read_db),
+                        user_id: int = Depends(check_jwt), limit: int = Query(20, ge=1, le=100),
+                        cursor: Optional[str] = Query(None), include_past: bool = Query(False)):
+
+    events, next_cursor = await event_service.search_events(db=db, text=q, limit=limit, cursor=cursor, include_past=include_past)
+    return Response(content=adapters.dump_json(adapters.EVENT_PAGE, {"items": events, "next_cursor": next_cursor}),
+                    media_type="application/json")
+
+@router.get("/live",
+    summary="Подписка на изменения мероприятий",
+    description="Поток Server-Sent Events вместо периодического опроса /events/{event_id}. Сначала приходит текущее состояние мероприятий (version, tickets_sold, capacity), затем событие event_update при каждом изменении. При смене version остальные поля карточки перечитайте с If-None-Match.")
+async def subscribe_to_events(ids: List[int] = Query(..., description="ID мероприятий, параметр повторяется: ?ids=1&ids=2"),
+                              user_id: int = Depends(check_jwt)):
+
+    event_ids = live_hub.check_subscription(ids)
+    return StreamingResponse(live_hub.stream(event_ids), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.get("/{event_id}", response_model=schemas.Event, status_code=status.HTTP_200_OK,
     summary="Получение мероприятия по ID",
-    description="Получение мероприятия по ID. Возвращает полную информацию о мероприятии.")
-async def get_event_by_id(event_id: int,db: AsyncSession = Depends(get_db), user_id: int = Depends(check_jwt)):
+    description="Получение мероприятия по ID. Возвращает полную информацию о мероприятии и число занятых мест, список участников — в /events/{event_id}/attendees. Поддерживает If-None-Match: если мероприятие не изменилось, возвращается 304.")
+async def get_event_by_id(request: Request, event_id: int,db: AsyncSession = Depends(get_db), user_id: int = Depends(check_jwt)):
+    # Карточка читается с основной базы: иначе отставание реплики попадёт в кеш.
 
-    event = await event_service.get_by_id(db=db,event_id = event_id)
+    version = await event_service.get_event_version(db=db, event_id=event_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Мероприятие с ID {event_id} не найдено.")
+    etag = conditional.make_etag("event", event_id, version[0])
+    headers = conditional.validator_headers(etag, version[1])
+    if conditional.etag_matches(request, etag):
+        return conditional.not_modified(headers)
+
+    event = await event_service.get_event_detail(db=db, event_id=event_id, version=version[0])
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Мероприятие с ID {event_id} не найдено.")
-    return event
+    return Response(content=event, media_type="application/json", headers=headers)
+
+
+@router.get("/{event_id}/attendees", response_model=schemas.AttendeePage, status_code=status.HTTP_200_OK,
+    summary="Участники мероприятия",
+    description="Получение страницы участников мероприятия в порядке регистрации. Для следующей страницы передайте next_cursor из ответа в параметр cursor.")
+async def get_event_attendees(event_id: int, db: AsyncSession = Depends(get_read_db), user_id: int = Depends(check_jwt),
+                              limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = Query(None)):
+
+    tickets, next_cursor = await ticket_service.get_attendees_page(db=db, event_id=event_id, limit=limit, cursor=cursor)
+    return {"items": tickets, "next_cursor": next_cursor}
@@ -0,0 +1,25 @@
+# app/routes/health.py
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.config import settings
+from app.db.database import check_database, engine
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live", status_code=status.HTTP_200_OK,
+    summary="Проверка жизнеспособности",
+    description="Процесс запущен и обрабатывает запросы. База не проверяется: её недоступность не повод перезапускать воркеры.")
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready", status_code=status.HTTP_200_OK,
+    summary="Проверка готовности",
+    description="Воркер запущен, не останавливается и видит основную базу. Пока ответ 503, балансировщик не должен направлять сюда запросы.")
+async def readiness(request: Request):
+    if not request.app.state.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Приложение запускается или останавливается.")
+    if not await check_database(engine, timeout=settings.readiness_timeout):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="База данных недоступна.")
+    return {"status": "ok"}
@@ -0,0 +1,12 @@
+# app/routes/metrics.py
+from fastapi import APIRouter, Response
+
+from app.service import telemetry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    content, media_type = telemetry.render_metrics()
+    return Response(content=content, media_type=media_type)
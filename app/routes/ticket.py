@@ -1,14 +1,18 @@
 from typing import List
 
-from fastapi import APIRouter, status, Depends, Body
+from fastapi import APIRouter, status, Depends, Body, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import get_db
-from app.schemas import schemas
+from app.db.database import get_db, get_read_db
+from app.schemas import adapters, schemas
+from app.service import conditional
 from app.service import ticket as ticket_service # <-- Импортируем наш новый сервис
 from app.service.security import check_jwt     # <-- Импортируем зависимость для аутентификации
+from app.config import settings
+from app.service import rate_limit
 
-router = APIRouter(prefix="/tickets", tags=["Tickets"])
+router = APIRouter(prefix="/tickets", tags=["Tickets"],
+                   dependencies=[Depends(rate_limit.limit_per_ip("tickets", settings.rate_limit_tickets))])
 
 @router.post("/", response_model=schemas.Ticket, status_code=status.HTTP_201_CREATED,
     summary="Регистрация на мероприятие",
@@ -18,6 +22,22 @@ async def register_user_for_event(db: AsyncSession = Depends(get_db), schema: sc
     ticket = await ticket_service.register_for_event(db=db, schema=schema, participant_id=user_id)
     return ticket
 
+@router.post("/batch", response_model=schemas.TicketBatchResult, status_code=status.HTTP_200_OK,
+    summary="Регистрация на несколько мероприятий",
+    description="Регистрирует текущего пользователя на список мероприятий одним запросом. Результат возвращается по каждому мероприятию: status_code и detail такие же, как у POST /tickets/. Успешные регистрации сохраняются, даже если часть мероприятий не подошла.")
+async def register_user_for_events(db: AsyncSession = Depends(get_db), schema: schemas.TicketBatchCreate = Body(...), user_id: int = Depends(check_jwt)):
+
+    items = await ticket_service.register_for_events(db=db, event_ids=schema.event_ids, participant_id=user_id)
+    return {"items": items}
+
+@router.delete("/batch", response_model=schemas.TicketBatchResult, status_code=status.HTTP_200_OK,
+    summary="Отмена нескольких регистраций",
+    description="Отменяет список регистраций текущего пользователя одним запросом. Результат возвращается по каждому билету: status_code и detail такие же, как у DELETE /tickets/{ticket_id}.")
+async def cancel_registrations_for_events(db: AsyncSession = Depends(get_db), schema: schemas.TicketBatchCancel = Body(...), user_id: int = Depends(check_jwt)):
+
+    items = await ticket_service.cancel_registrations(db=db, ticket_ids=schema.ticket_ids, user_id=user_id)
+    return {"items": items}
+
 @router.delete("/{ticket_id}", status_code=status.HTTP_204_NO_CONTENT,
     summary="Отмена регистрации на мероприятие",
     description="Позволяет отменить регистрацию текущего пользователя на зарегистрированное мероприятие. Нельзя отменить регистрацию, если мероприятие уже началось.")
@@ -28,8 +48,15 @@ async def cancel_registration_for_event(ticket_id: int, db: AsyncSession = Depen
 
 @router.get("", response_model=List[schemas.Ticket],
     summary="Получение моих билетов",
-    description="Возвращает список всех билетов, на которые подтвердил пользователь.")
-async def get_my_tickets(db: AsyncSession = Depends(get_db), user_id: int = Depends(check_jwt),):
+    description="Возвращает список всех билетов, на которые подтвердил пользователь. Поддерживает If-None-Match: если список не изменился, возвращается 304.")
+async def get_my_tickets(request: Request, db: AsyncSession = Depends(get_read_db), user_id: int = Depends(check_jwt),):
+
+    version = await ticket_service.get_tickets_version(db=db, user_id=user_id)
+    etag = conditional.make_etag("tickets", user_id, *version)
+    headers = conditional.validator_headers(etag, version[3])
+    if conditional.etag_matches(request, etag):
+        return conditional.not_modified(headers)
 
     tickets = await ticket_service.get_tickets_by_user_id(db=db, user_id=user_id)
-    return tickets
\ No newline at end of file
+    return Response(content=adapters.dump_json(adapters.TICKET_LIST, tickets), media_type="application/json",
+                    headers=headers)
\ No newline at end of file
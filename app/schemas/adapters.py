@@ -0,0 +1,19 @@
+# app/schemas/adapters.py
+from typing import Any, List
+
+from pydantic import TypeAdapter
+
+from app.schemas import schemas
+
+# Заранее собранные адаптеры для списков, которые сервисы отдают простыми dict.
+# Проверка dict и сериализация выполняются в pydantic-core за один проход,
+# без ORM-объектов и from_attributes; JSON совпадает с тем, что FastAPI
+# строит по response_model.
+EVENT_PAGE = TypeAdapter(schemas.EventPage)
+EVENT_LIST = TypeAdapter(List[schemas.EventShort])
+TICKET_LIST = TypeAdapter(List[schemas.Ticket])
+
+
+def dump_json(adapter: TypeAdapter, data: Any) -> bytes:
+    # Проверяет данные по схеме ответа и сразу сериализует их в JSON.
+    return adapter.dump_json(adapter.validate_python(data))
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 
 #Вспомогательные схемы
 class OwnerInEvent(BaseModel):
@@ -50,8 +50,9 @@ class UpdatePassword(BaseModel):
 class User(BaseModel):
     id: int
     username: str
-    created_events: List[EventInUser] = []
-    tickets: List[TicketInUser] = []
+    # У ORM-объекта берутся списки вместе с архивом (models.User.all_created_events, all_tickets).
+    created_events: List[EventInUser] = Field([], validation_alias=AliasChoices("all_created_events", "created_events"))
+    tickets: List[TicketInUser] = Field([], validation_alias=AliasChoices("all_tickets", "tickets"))
     is_admin: bool
 
     class Config:
@@ -66,6 +67,16 @@ class UserAdminView(BaseModel):
     class Config:
         from_attributes = True
 
+class BanUsersRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class BanUsersResult(BaseModel):
+    # Результат задачи ban_users (поле result в GET /admin/jobs/{job_id}).
+    banned_users: int
+    deleted_events: int
+    deleted_tickets: int
+    not_found: List[int] = []
+
 class UserAuth(BaseModel):
     username: str = Field(..., min_length=5)
     password: str = Field(..., min_length=5)
@@ -84,12 +95,14 @@ class EventCreate(BaseModel):
     description: str
     start_time: datetime
     location: str = Field(..., min_length=4)
+    capacity: Optional[int] = Field(None, ge=1)
 
 class EventUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=4)
     description: Optional[str] = None
     start_time: Optional[datetime] = None
     location: Optional[str] = Field(None, min_length=4)
+    capacity: Optional[int] = Field(None, ge=1)
 
 class Event(BaseModel):
     id: int
@@ -97,8 +110,9 @@ class Event(BaseModel):
     description: str
     start_time: datetime
     location: str
+    capacity: Optional[int] = None
+    tickets_sold: int = 0
     owner: OwnerInEvent
-    tickets: List[TicketInEvent] = []
 
     class Config:
         from_attributes = True
@@ -109,11 +123,39 @@ class EventShort(BaseModel):
     description: str
     start_time: datetime
     location: str
+    capacity: Optional[int] = None
+    tickets_sold: int = 0
     owner: OwnerInEvent
 
     class Config:
         from_attributes = True
 
+class EventPage(BaseModel):
+    items: List[EventShort] = []
+    next_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AttendeePage(BaseModel):
+    items: List[TicketInEvent] = []
+    next_cursor: Optional[str] = None
+
+
+#Схемы фоновых задач
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 
 #Схемы билетов
@@ -129,6 +171,22 @@ class Ticket(BaseModel):
     class Config:
         from_attributes = True
 
+class TicketBatchCreate(BaseModel):
+    event_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+class TicketBatchCancel(BaseModel):
+    ticket_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+class TicketBatchItem(BaseModel):
+    # Результат по одному элементу пакета: status_code и detail — как у одиночного эндпоинта.
+    event_id: Optional[int] = None
+    ticket_id: Optional[int] = None
+    status_code: int
+    detail: Optional[str] = None
+
+class TicketBatchResult(BaseModel):
+    items: List[TicketBatchItem]
+
 Event.model_rebuild()
 Ticket.model_rebuild()
 User.model_rebuild()
@@ -0,0 +1,37 @@
+# app/server.py
+
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn_worker import UvicornWorker
+
+from app.main import begin_draining
+
+# Воркер gunicorn для продакшен-профиля (gunicorn.conf.py).
+
+# Запас времени на shutdown lifespan после ожидания запросов, иначе мастер убьёт воркер
+# по graceful_timeout раньше, чем закроются пулы и соединения.
+SHUTDOWN_RESERVE = 5
+
+
+class DrainingServer(Server):
+    # Перед ожиданием незавершённых запросов переводит приложение в режим остановки:
+    # иначе открытые потоки /events/live держали бы воркер до самого таймаута.
+    async def shutdown(self, sockets=None):
+        await begin_draining(self.config.app)
+        await super().shutdown(sockets=sockets)
+
+
+class AppUvicornWorker(UvicornWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - SHUTDOWN_RESERVE, 1)
+
+    async def _serve(self):
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -8,11 +8,11 @@ from app.service import security
 
 async def register_new_user(db: AsyncSession, user_schema: schemas.UserAuth) -> models.User:
     # Регистрация нового пользователя
-    existing_user = await user_service.get_by_username(db, username=user_schema.username)
+    existing_user = await user_service.get_by_username(db, username=user_schema.username, profile="summary")
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь уже существует")
 
-    hashed_password = security.get_password_hash(user_schema.password)
+    hashed_password = await security.get_password_hash(user_schema.password)
 
     new_user_instance = await create(db=db, username=user_schema.username, hashed_password=hashed_password)
 
@@ -25,11 +25,11 @@ async def register_new_admin(db: AsyncSession, user_schema: schemas.UserAuth, pa
     # Регистрация нового адмнистратора
     if password != "admin":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный пароль")
-    existing_user = await user_service.get_by_username(db, username=user_schema.username)
+    existing_user = await user_service.get_by_username(db, username=user_schema.username, profile="summary")
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Пользователь уже существует")
 
-    hashed_password = security.get_password_hash(user_schema.password)
+    hashed_password = await security.get_password_hash(user_schema.password)
 
     new_user_instance = await create_admin(db=db, username=user_schema.username, hashed_password=hashed_password)
 
@@ -38,9 +38,9 @@ async def register_new_admin(db: AsyncSession, user_schema: schemas.UserAuth, pa
     return created_user
 async def authenticate_user(db: AsyncSession, user_schema: schemas.UserAuth) -> models.User:
     # Аутентификация пользователя
-    user = await user_service.get_by_username(db, username=user_schema.username)
+    user = await user_service.get_by_username(db, username=user_schema.username, profile="auth")
 
-    if not user or not security.verify_password(user_schema.password, user.hashed_password):
+    if not user or not await security.verify_password(user_schema.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный логин или пароль")
     if user.banned:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ваш аккаунт заблокирован.")
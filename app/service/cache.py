@@ -0,0 +1,190 @@
+# app/service/cache.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+
+class LRUTTLCache:
+    # Ограниченный по размеру кеш в памяти процесса: вытесняет давно не использованные
+    # записи и не отдаёт записи с истёкшим сроком жизни.
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expires_at: float):
+        # expires_at — абсолютное время истечения (unix time).
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (expires_at, value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryCacheBackend:
+    # Хранилище кеша в памяти процесса.
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        self._cache = LRUTTLCache(maxsize=maxsize)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        self._cache.set(key, value, expires_at=time.time() + ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        return {"size": stats["size"], "maxsize": stats["maxsize"], "evictions": stats["evictions"]}
+
+    async def close(self):
+        self._cache.clear()
+
+
+class RedisCacheBackend:
+    # Общее для всех воркеров хранилище в Redis (или совместимом сервере).
+    name = "redis"
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("Для кеша в Redis установите пакет redis.")
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int):
+        await self._client.set(key, value, ex=ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {}
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def build_cache_backend(backend: str, maxsize: int, redis_url: Optional[str] = None):
+    # Создаёт хранилище кеша по имени из настроек.
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("Для кеша в Redis задайте адрес сервера.")
+        return RedisCacheBackend(redis_url)
+    return MemoryCacheBackend(maxsize=maxsize)
+
+
+class ReadThroughCache:
+    # Кеш со сквозным чтением: при промахе значение строит loader.
+    # Холодную запись в процессе перестраивает только одна корутина, остальные ждут её.
+    def __init__(self, backend, namespace: str, ttl: int):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._waiters: dict[str, int] = {}
+        self._generations: dict[str, int] = {}
+
+    def _key(self, key: Any) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Optional[bytes]]],
+                          is_fresh: Optional[Callable[[bytes], bool]] = None) -> Optional[bytes]:
+        # is_fresh отбраковывает сохранённое значение (например, другой версии): оно строится заново.
+        # Нужен там, где инвалидация не доходит до всех процессов, — у кеша в памяти каждого воркера.
+        cache_key = self._key(key)
+        value = await self.backend.get(cache_key)
+        if value is not None and (is_fresh is None or is_fresh(value)):
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        lock = self._locks.setdefault(cache_key, asyncio.Lock())
+        self._waiters[cache_key] = self._waiters.get(cache_key, 0) + 1
+        try:
+            async with lock:
+                value = await self.backend.get(cache_key)
+                if value is not None and (is_fresh is None or is_fresh(value)):
+                    return value
+
+                generation = self._generations.get(cache_key, 0)
+                self.loads += 1
+                value = await loader()
+                # Если пока строилось значение, запись инвалидировали, — не сохраняем устаревшие данные.
+                if value is not None and generation == self._generations.get(cache_key, 0):
+                    await self.backend.set(cache_key, value, self.ttl)
+                return value
+        finally:
+            self._waiters[cache_key] -= 1
+            if not self._waiters[cache_key]:
+                del self._waiters[cache_key]
+                del self._locks[cache_key]
+                self._generations.pop(cache_key, None)
+
+    async def invalidate(self, *keys: Any):
+        cache_keys = [self._key(key) for key in keys]
+        for cache_key in cache_keys:
+            if cache_key in self._locks:
+                self._generations[cache_key] = self._generations.get(cache_key, 0) + 1
+        await self.backend.delete(*cache_keys)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            **self.backend.stats(),
+        }
+
+    async def close(self):
+        await self.backend.close()
@@ -0,0 +1,47 @@
+# app/service/conditional.py
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Условные GET-запросы: ETag строится из версии данных, которую можно получить
+# одним дешёвым запросом, и при совпадении с If-None-Match отдаётся 304 без тела.
+# If-Modified-Since не учитывается: точность Last-Modified — секунда, а версия
+# может смениться несколько раз за секунду.
+
+
+def make_etag(*parts) -> str:
+    # Слабый ETag: одинаковые данные дают одинаковый JSON, но побайтовое совпадение не обещается.
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # Слабое сравнение по RFC 9110: префикс W/ не учитывается.
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
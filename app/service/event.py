@@ -1,16 +1,30 @@
-from datetime import datetime
-from typing import List
+import base64
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import delete, exists, func, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
-import app.service.user as user_service
-import app.service.security as security
+from app.service import jobs
+from app.service.cache import ReadThroughCache, build_cache_backend
+from app.service.live import live_hub
+from app.service.search import SEARCH_DOCUMENT, fallback_search_index, search_query
 
+from app.config import settings
 from app.db import models
 from app.schemas import schemas
 
+EventProfile = Literal["bare", "summary"]
+
+event_cache = ReadThroughCache(
+    build_cache_backend(settings.event_cache_backend, maxsize=settings.event_cache_maxsize,
+                        redis_url=settings.event_cache_redis_url),
+    namespace="event",
+    ttl=settings.event_cache_ttl,
+)
+
 
 async def create_event(db: AsyncSession, schema: schemas.EventCreate, user_id: int) -> models.Event:
     # Создание нового мероприятия
@@ -20,6 +34,7 @@ async def create_event(db: AsyncSession, schema: schemas.EventCreate, user_id: i
     db.add(db_event)
     await db.commit()
     await db.refresh(db_event)
+    fallback_search_index.mark_stale()
 
     created_event = await get_by_id(db, event_id=db_event.id)
 
@@ -28,7 +43,7 @@ async def create_event(db: AsyncSession, schema: schemas.EventCreate, user_id: i
 
 async def update_event(db: AsyncSession, event_id: int, schema: schemas.EventUpdate, user_id: int) -> models.Event:
     # Обновление мероприятия
-    event_to_update = await get_by_id(db, event_id=event_id)
+    event_to_update = await get_by_id(db, event_id=event_id, profile="bare")
 
     if not event_to_update:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие не найдено.")
@@ -38,104 +53,477 @@ async def update_event(db: AsyncSession, event_id: int, schema: schemas.EventUpd
 
     update_data = schema.model_dump(exclude_unset=True)
 
-    for key, value in update_data.items():
-        setattr(event_to_update, key, value)
+    # Условный UPDATE: число мест сравнивается с tickets_sold в момент записи, а не с прочитанным выше,
+    # иначе регистрация между чтением и записью нарушит ограничение ck_events_tickets_sold.
+    query = (
+        update(models.Event)
+        .where(models.Event.id == event_id)
+        .values(**update_data, version=models.Event.version + 1)
+        .returning(models.Event.version, models.Event.tickets_sold, models.Event.capacity)
+        .execution_options(synchronize_session=False)
+    )
+    new_capacity = update_data.get("capacity")
+    if new_capacity is not None:
+        query = query.where(models.Event.tickets_sold <= new_capacity)
+    state = (await db.execute(query)).first()
+    if state is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Количество мест не может быть меньше числа уже выданных билетов.")
 
-    db.add(event_to_update)
     await db.commit()
-    await db.refresh(event_to_update)
+    db.expire(event_to_update)
+    await invalidate_events(event_id)
+    fallback_search_index.mark_stale()
+    await live_hub.publish(event_id, version=state.version, tickets_sold=state.tickets_sold, capacity=state.capacity)
 
-    updated_event = await get_by_id(db, event_id=event_to_update.id)
+    updated_event = await get_by_id(db, event_id=event_id)
     return updated_event
 
 
-async def get_by_id(db: AsyncSession, event_id: int) -> models.Event | None:
-    # Получение мероприятия по ID
+def event_load_options(profile: EventProfile) -> list:
+    # Опции загрузки мероприятия под конкретный сценарий:
+    # bare — только колонки мероприятия (проверки существования и владельца),
+    # summary — с владельцем (для schemas.Event и schemas.EventShort).
+    # Участники в карточку не загружаются: они отдаются постранично через get_attendees_page.
+    if profile == "bare":
+        return []
+    return [joinedload(models.Event.owner).load_only(models.User.id, models.User.username)]
+
+
+async def get_by_id(db: AsyncSession, event_id: int, profile: EventProfile = "summary") -> models.Event | None:
+    # Получение мероприятия по ID, набор загружаемых данных задаётся профилем
     query = (
         select(models.Event)
         .where(models.Event.id == event_id)
-        .options(
-            joinedload(models.Event.owner),
-            joinedload(models.Event.tickets)
-        )
+        .options(*event_load_options(profile))
     )
     result = await db.execute(query)
-    return result.scalars().unique().first()
+    return result.scalars().first()
 
 
-async def get_events_by_owner(db: AsyncSession, owner_id: int) -> List[models.Event]:
-    # Получение списка всех мероприятий, созданных пользователем.
+async def get_archived_by_id(db: AsyncSession, event_id: int) -> models.ArchivedEvent | None:
+    # Получение архивного мероприятия по ID вместе с владельцем
     query = (
-        select(models.Event)
-        .where(models.Event.owner_id == owner_id)
-        .options(
-            joinedload(models.Event.owner)
-            )
-        )
+        select(models.ArchivedEvent)
+        .where(models.ArchivedEvent.id == event_id)
+        .options(joinedload(models.ArchivedEvent.owner).load_only(models.User.id, models.User.username))
+    )
     result = await db.execute(query)
-    return result.scalars().unique().all()
+    return result.scalars().first()
+
+
+async def get_event_version(db: AsyncSession, event_id: int) -> Tuple[int, datetime] | None:
+    # Версия и время изменения мероприятия для ETag карточки (с учётом архива), без загрузки строки целиком.
+    for model in (models.Event, models.ArchivedEvent):
+        row = (await db.execute(select(model.version, model.updated_at).where(model.id == event_id))).first()
+        if row:
+            return row.version, row.updated_at
+    return None
+
+
+async def find_event_model(db: AsyncSession, event_id: int):
+    # Таблица, в которой сейчас лежит мероприятие: models.Event, models.ArchivedEvent или None.
+    for model in (models.Event, models.ArchivedEvent):
+        if await db.scalar(select(exists().where(model.id == event_id))):
+            return model
+    return None
+
 
-async def get_events_by_owner_active(db: AsyncSession, owner_id: int) -> List[models.Event]:
+async def get_event_detail(db: AsyncSession, event_id: int, version: int) -> bytes | None:
+    # Получение карточки мероприятия (schemas.Event) в виде готового JSON, через кеш.
+    # Если мероприятия нет в events, оно ищется в архиве.
+    # В кеше карточка хранится с префиксом "<version>:" и отдаётся, только если версия совпадает
+    # с той, по которой построен ETag: инвалидация в памяти доходит лишь до воркера, принявшего изменение.
+    async def load() -> bytes | None:
+        event = await get_by_id(db, event_id=event_id, profile="summary")
+        if not event:
+            event = await get_archived_by_id(db, event_id=event_id)
+        if not event:
+            return None
+        body = schemas.Event.model_validate(event, from_attributes=True).model_dump_json().encode("utf-8")
+        return b"%d:%s" % (event.version, body)
+
+    if settings.event_cache_enabled:
+        prefix = b"%d:" % version
+        value = await event_cache.get_or_load(event_id, load, is_fresh=lambda value: value.startswith(prefix))
+    else:
+        value = await load()
+    if value is None:
+        return None
+    return value.partition(b":")[2]
+
+
+async def invalidate_events(*event_ids: int):
+    # Сбрасывает кеш карточек мероприятий после их изменения.
+    if event_ids:
+        await event_cache.invalidate(*event_ids)
+
+
+async def touch_owner_events(db: AsyncSession, owner_id: int) -> List[int]:
+    # Карточки и ленты показывают имя владельца: при его смене version мероприятий
+    # (в том числе архивных) увеличивается, чтобы старые ETag перестали совпадать.
+    # Транзакцию фиксирует вызывающий код.
+    event_ids = []
+    for model in (models.Event, models.ArchivedEvent):
+        result = await db.execute(
+            update(model)
+            .where(model.owner_id == owner_id)
+            .values(version=model.version + 1, updated_at=models.utcnow())
+            .returning(model.id)
+            .execution_options(synchronize_session=False)
+        )
+        event_ids.extend(result.scalars().all())
+    return event_ids
+
+
+def event_summary_select(model=models.Event):
+    # Колонки schemas.EventShort без ORM-объектов: владелец присоединяется тем же запросом.
+    # Списки строятся из простых строк и сериализуются через app.schemas.adapters.
+    return (
+        select(model.id, model.title, model.description, model.start_time, model.location, model.capacity,
+               model.tickets_sold, models.User.id.label("owner_id"), models.User.username.label("owner_username"))
+        .outerjoin(models.User, model.owner_id == models.User.id)
+    )
+
+
+def event_summary(row) -> dict:
+    # Строка event_summary_select в виде dict по схеме schemas.EventShort.
+    return {
+        "id": row.id,
+        "title": row.title,
+        "description": row.description,
+        "start_time": row.start_time,
+        "location": row.location,
+        "capacity": row.capacity,
+        "tickets_sold": row.tickets_sold,
+        "owner": {"id": row.owner_id, "username": row.owner_username},
+    }
+
+
+async def get_events_by_owner(db: AsyncSession, owner_id: int) -> List[dict]:
+    # Получение списка всех мероприятий, созданных пользователем, включая архивные (после текущих).
+    rows = []
+    for model in (models.Event, models.ArchivedEvent):
+        query = event_summary_select(model).where(model.owner_id == owner_id)
+        rows.extend((await db.execute(query)).all())
+    return [event_summary(row) for row in rows]
+
+async def get_events_by_owner_active(db: AsyncSession, owner_id: int) -> List[dict]:
     # Получение списка будущих мероприятий, созданных пользователем.
+    # Архив не читается: туда попадают только давно прошедшие мероприятия.
     query = (
-        select(models.Event)
+        event_summary_select()
         .where(models.Event.owner_id == owner_id)
         .where(models.Event.start_time > datetime.now())
-        .options(
-            joinedload(models.Event.owner)
-            )
         )
     result = await db.execute(query)
-    return result.scalars().unique().all()
+    return [event_summary(row) for row in result]
 
-async def get_all_active_events(db: AsyncSession) -> List[models.Event]:
-   # Получение списка будущих мероприятий.
-    query = (
-        select(models.Event)
-        .where(models.Event.start_time > datetime.now())
-        .options(
-            joinedload(models.Event.owner)
-        )
-    )
-    result = await db.execute(query)
-    return result.scalars().unique().all()
+def encode_cursor(start_time: datetime, event_id: int) -> str:
+    # Кодирует позицию в ленте (start_time, id) в непрозрачный курсор.
+    raw = f"{start_time.isoformat()}|{event_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    # Декодирует курсор ленты обратно в пару (start_time, id).
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        start_time, event_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(start_time), int(event_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор.")
 
-async def get_old_events(db: AsyncSession) -> List[models.Event]:
-    # Получение списка прошедших мероприятий.
-    query = (
-        select(models.Event)
-        .where(models.Event.start_time <= datetime.now())
-        .options(
-            joinedload(models.Event.owner)
-        )
-    )
-    result = await db.execute(query)
-    return result.scalars().unique().all()
 
+def encode_rank_cursor(rank: float, event_id: int) -> str:
+    # Кодирует позицию в результатах поиска (релевантность, id) в непрозрачный курсор.
+    raw = f"{rank!r}|{event_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
 
-async def delete_event_by_admin(db: AsyncSession, event_id: int, user_id: int):
-    # Удаляет мероприятие (только для администраторов).
-    user = await user_service.get_by_id(db,user_id=user_id)
-    await security.check_admin(user)
-    event_to_delete = await get_by_id(db, event_id=event_id)
-    if not event_to_delete:
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    # Декодирует курсор поиска обратно в пару (релевантность, id).
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        rank, event_id = raw.rsplit("|", 1)
+        rank = float(rank)
+        # float() принимает "nan" и "inf", а с ними сравнение по релевантности теряет смысл
+        if not math.isfinite(rank):
+            raise ValueError(rank)
+        return rank, int(event_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор.")
+
+
+def apply_event_filters(query, location: Optional[str] = None, owner_id: Optional[int] = None,
+                        start_from: Optional[datetime] = None, start_to: Optional[datetime] = None,
+                        model=models.Event):
+    # Добавляет в запрос фильтры ленты по месту, владельцу и временному окну.
+    # model — models.Event или models.ArchivedEvent, у них одинаковые колонки.
+    if location:
+        # % и _ в строке пользователя — обычные символы, а не шаблон LIKE
+        pattern = location.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(model.location.ilike(f"%{pattern}%", escape="\\"))
+    if owner_id is not None:
+        query = query.where(model.owner_id == owner_id)
+    if start_from is not None:
+        query = query.where(model.start_time >= start_from)
+    if start_to is not None:
+        query = query.where(model.start_time < start_to)
+    return query
+
+
+def order_page(query, cursor: Optional[str] = None, descending: bool = False, model=models.Event):
+    # Продолжает ленту после курсора и сортирует по ключу (start_time, id).
+    position = tuple_(model.start_time, model.id)
+    if cursor:
+        start_time, event_id = decode_cursor(cursor)
+        if descending:
+            query = query.where(position < tuple_(start_time, event_id))
+        else:
+            query = query.where(position > tuple_(start_time, event_id))
+
+    if descending:
+        return query.order_by(model.start_time.desc(), model.id.desc())
+    return query.order_by(model.start_time, model.id)
+
+
+async def get_events_page(db: AsyncSession, query, limit: int, cursor: Optional[str] = None,
+                          descending: bool = False) -> Tuple[List[dict], Optional[str]]:
+    # Возвращает страницу ленты по ключу (start_time, id) и курсор следующей страницы.
+    query = order_page(query, cursor=cursor, descending=descending)
+    rows = (await db.execute(query.limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_time, rows[-1].id)
+    return [event_summary(row) for row in rows], next_cursor
+
+
+async def get_all_active_events(db: AsyncSession, limit: int = 20, cursor: Optional[str] = None,
+                                location: Optional[str] = None, owner_id: Optional[int] = None,
+                                start_from: Optional[datetime] = None,
+                                start_to: Optional[datetime] = None) -> Tuple[List[dict], Optional[str]]:
+    # Получение страницы будущих мероприятий, ближайшие первыми.
+    query = active_events_query(event_summary_select(), location=location, owner_id=owner_id,
+                                start_from=start_from, start_to=start_to)
+    return await get_events_page(db, query, limit=limit, cursor=cursor)
+
+
+def active_events_query(query, location: Optional[str] = None, owner_id: Optional[int] = None,
+                        start_from: Optional[datetime] = None, start_to: Optional[datetime] = None):
+    # Условия ленты будущих мероприятий; общие для страницы и её версии.
+    query = query.where(models.Event.start_time > datetime.now())
+    return apply_event_filters(query, location=location, owner_id=owner_id, start_from=start_from, start_to=start_to)
+
+
+async def get_active_events_version(db: AsyncSession, limit: int = 20, cursor: Optional[str] = None,
+                                    location: Optional[str] = None, owner_id: Optional[int] = None,
+                                    start_from: Optional[datetime] = None,
+                                    start_to: Optional[datetime] = None) -> tuple:
+    # Версия страницы ленты для ETag: агрегат по тем же строкам, что попадут на страницу,
+    # только по индексу events, без join с владельцами и без сериализации.
+    query = active_events_query(select(models.Event.id, models.Event.version, models.Event.updated_at),
+                                location=location, owner_id=owner_id, start_from=start_from, start_to=start_to)
+    page = order_page(query, cursor=cursor).limit(limit + 1).subquery()
+    row = (await db.execute(
+        select(func.count(), func.sum(page.c.id), func.sum(page.c.version), func.max(page.c.updated_at))
+    )).one()
+    return tuple(row)
+
+async def get_old_events(db: AsyncSession, limit: int = 20, cursor: Optional[str] = None,
+                         location: Optional[str] = None, owner_id: Optional[int] = None,
+                         start_from: Optional[datetime] = None,
+                         start_to: Optional[datetime] = None) -> Tuple[List[dict], Optional[str]]:
+    # Получение страницы прошедших мероприятий, последние первыми. Лента объединяет
+    # events и архив: из каждой таблицы берётся не больше limit + 1 строк по индексу
+    # (start_time, id), затем они сливаются по тому же ключу.
+    pages = []
+    for model in (models.Event, models.ArchivedEvent):
+        query = event_summary_select(model).where(model.start_time <= datetime.now())
+        query = apply_event_filters(query, location=location, owner_id=owner_id, start_from=start_from,
+                                    start_to=start_to, model=model)
+        query = order_page(query, cursor=cursor, descending=True, model=model)
+        pages.append((await db.execute(query.limit(limit + 1))).all())
+
+    rows = sorted(pages[0] + pages[1], key=lambda row: (row.start_time, row.id), reverse=True)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].start_time, rows[-1].id)
+    return [event_summary(row) for row in rows], next_cursor
+
+
+async def search_events(db: AsyncSession, text: str, limit: int = 20, cursor: Optional[str] = None,
+                        include_past: bool = False) -> Tuple[List[dict], Optional[str]]:
+    # Полнотекстовый поиск по названию, описанию и месту, самые релевантные первыми.
+    if db.bind.dialect.name != "postgresql":
+        return await search_events_fallback(db, text, limit=limit, cursor=cursor, include_past=include_past)
+
+    tsquery = search_query(text)
+    rank = func.ts_rank(SEARCH_DOCUMENT, tsquery)
+    query = event_summary_select().add_columns(rank.label("rank")).where(SEARCH_DOCUMENT.op("@@")(tsquery))
+    if not include_past:
+        query = query.where(models.Event.start_time > datetime.now())
+    if cursor:
+        last_rank, last_id = decode_rank_cursor(cursor)
+        query = query.where(tuple_(rank, models.Event.id) < tuple_(last_rank, last_id))
+    query = query.order_by(rank.desc(), models.Event.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(query)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_rank_cursor(rows[-1].rank, rows[-1].id)
+    return [event_summary(row) for row in rows], next_cursor
+
+
+async def search_events_fallback(db: AsyncSession, text: str, limit: int = 20, cursor: Optional[str] = None,
+                                 include_past: bool = False) -> Tuple[List[dict], Optional[str]]:
+    # Поиск через индекс в памяти процесса для баз без полнотекстового поиска.
+    await fallback_search_index.ensure_built(db)
+    results = fallback_search_index.search(text, active_after=None if include_past else datetime.now(timezone.utc))
+    if cursor:
+        position = decode_rank_cursor(cursor)
+        results = [result for result in results if result < position]
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_rank_cursor(*results[-1])
+
+    event_ids = [event_id for _, event_id in results]
+    query = event_summary_select().where(models.Event.id.in_(event_ids))
+    events = {row.id: event_summary(row) for row in await db.execute(query)}
+    return [events[event_id] for event_id in event_ids if event_id in events], next_cursor
+
+
+async def request_event_deletion(db: AsyncSession, event_id: int, admin_user: models.User) -> models.Job:
+    # Ставит удаление мероприятия в очередь (права администратора проверяет зависимость get_current_admin).
+    # Задача delete_events удаляет и из events, и из архива.
+    if not await find_event_model(db, event_id=event_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Мероприятие не найдено."
         )
+    return await jobs.enqueue(db, "delete_events", {"event_ids": [event_id]}, created_by=admin_user.id)
+
+
+async def request_past_events_purge(db: AsyncSession, before: datetime, admin_user: models.User) -> models.Job:
+    # Ставит в очередь удаление всех мероприятий, начавшихся раньше before.
+    if before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+    if before > datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Удалять можно только прошедшие мероприятия."
+        )
+    return await jobs.enqueue(db, "purge_past_events", {"before": before.isoformat()}, created_by=admin_user.id)
+
 
-    await db.delete(event_to_delete)
+@jobs.job_handler("delete_events")
+async def run_delete_events_job(db: AsyncSession, payload: dict) -> dict:
+    # Удаление мероприятий по списку ID из events и архива; уже удалённые просто пропускаются.
+    event_ids, deleted_tickets = await delete_events(db, models.Event.id.in_(payload["event_ids"]))
+    archived_ids, archived_tickets = await delete_events(db, models.ArchivedEvent.id.in_(payload["event_ids"]),
+                                                         archived=True)
     await db.commit()
-    return
+    await invalidate_events(*event_ids, *archived_ids)
+    return {"deleted_events": len(event_ids) + len(archived_ids), "deleted_tickets": deleted_tickets + archived_tickets}
 
 
-async def delete_events_by_owner(db: AsyncSession, owner_id: int):
-    # Удаляет все мероприятия пользователя.
-    query = select(models.Event).where(models.Event.owner_id == owner_id)
-    result = await db.execute(query)
-    events_to_delete = result.scalars().all()
+@jobs.job_handler("purge_past_events")
+async def run_purge_past_events_job(db: AsyncSession, payload: dict) -> dict:
+    # Удаляет прошедшие мероприятия из events и архива пачками, каждая пачка — отдельная короткая
+    # транзакция, поэтому блокировки не держатся долго, а повтор после сбоя продолжает с того же места.
+    before = datetime.fromisoformat(payload["before"])
+    deleted_events = deleted_tickets = 0
+    for model in (models.Event, models.ArchivedEvent):
+        while True:
+            batch = select(model.id).where(model.start_time < before).order_by(model.id)
+            batch_ids = list((await db.execute(batch.limit(settings.jobs_batch_size))).scalars().all())
+            if not batch_ids:
+                break
+            event_ids, tickets = await delete_events(db, model.id.in_(batch_ids),
+                                                     archived=model is models.ArchivedEvent)
+            await db.commit()
+            await invalidate_events(*event_ids)
+            deleted_events += len(event_ids)
+            deleted_tickets += tickets
+    return {"deleted_events": deleted_events, "deleted_tickets": deleted_tickets}
+
 
-    if events_to_delete:
-        for event in events_to_delete:
-            await db.delete(event)
-    return
\ No newline at end of file
+@jobs.job_handler("archive_events")
+async def run_archive_events_job(db: AsyncSession, payload: dict) -> dict:
+    # Переносит мероприятия, начавшиеся больше archive_after_days дней назад, вместе с билетами
+    # в архивные таблицы. Каждая пачка переносится одной транзакцией: копия и удаление вместе.
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.archive_after_days)
+    archived_events = archived_tickets = 0
+    while True:
+        batch = (
+            select(models.Event.id)
+            .where(models.Event.start_time < cutoff)
+            .order_by(models.Event.id)
+            .limit(settings.jobs_batch_size)
+            .with_for_update()
+        )
+        batch_ids = list((await db.execute(batch)).scalars().all())
+        if not batch_ids:
+            break
+
+        event_columns = ["id", "title", "description", "start_time", "location", "owner_id", "capacity", "tickets_sold",
+                         "version", "updated_at"]
+        await db.execute(
+            insert(models.ArchivedEvent).from_select(
+                event_columns,
+                select(*(getattr(models.Event, column) for column in event_columns))
+                .where(models.Event.id.in_(batch_ids))
+            )
+        )
+        await db.execute(
+            insert(models.ArchivedTicket).from_select(
+                ["id", "event_id", "participant_id"],
+                select(models.Ticket.id, models.Ticket.event_id, models.Ticket.participant_id)
+                .where(models.Ticket.event_id.in_(batch_ids))
+            )
+        )
+        event_ids, tickets = await delete_events(db, models.Event.id.in_(batch_ids))
+        await db.commit()
+        archived_events += len(event_ids)
+        archived_tickets += tickets
+    return {"archived_events": archived_events, "archived_tickets": archived_tickets}
+
+
+async def delete_events_by_owners(db: AsyncSession, owner_ids: List[int]) -> Tuple[List[int], int]:
+    # Удаляет все мероприятия пользователей, в том числе архивные.
+    # Возвращает ID удалённых мероприятий и число удалённых билетов.
+    if not owner_ids:
+        return [], 0
+    event_ids, tickets = await delete_events(db, models.Event.owner_id.in_(owner_ids))
+    archived_ids, archived_tickets = await delete_events(db, models.ArchivedEvent.owner_id.in_(owner_ids),
+                                                         archived=True)
+    return event_ids + archived_ids, tickets + archived_tickets
+
+
+async def delete_events(db: AsyncSession, condition, archived: bool = False) -> Tuple[List[int], int]:
+    # Удаляет мероприятия, подходящие под условие, двумя запросами, без загрузки объектов.
+    # archived=True — удаление из архивных таблиц, условие тогда строится по models.ArchivedEvent.
+    # Билеты удаляются явно ради подсчёта и для баз без каскада; в Postgres их удалил бы и ON DELETE CASCADE.
+    # Транзакцию фиксирует вызывающий код.
+    event_model, ticket_model = (models.ArchivedEvent, models.ArchivedTicket) if archived else (models.Event, models.Ticket)
+    tickets_result = await db.execute(
+        delete(ticket_model)
+        .where(ticket_model.event_id.in_(select(event_model.id).where(condition)))
+        .execution_options(synchronize_session=False)
+    )
+    events_result = await db.execute(
+        delete(event_model)
+        .where(condition)
+        .returning(event_model.id)
+        .execution_options(synchronize_session=False)
+    )
+    if not archived:
+        fallback_search_index.mark_stale()
+    return list(events_result.scalars().all()), tickets_result.rowcount
@@ -0,0 +1,82 @@
+# app/service/export.py
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Literal
+
+from sqlalchemy import select, union_all
+
+from app.db import models
+from app.db.database import ReadSessionLocal
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_BATCH_SIZE = 1000
+
+EVENT_FIELDS = ["id", "title", "description", "start_time", "location", "capacity", "tickets_sold",
+                "owner_id", "owner_username"]
+ATTENDEE_FIELDS = ["ticket_id", "event_id", "participant_id", "username"]
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _format_rows(rows, fields: List[str], export_format: ExportFormat) -> str:
+    # Сериализует пачку строк в NDJSON или CSV.
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_json_value(row[field]) for field in fields])
+        return buffer.getvalue()
+    return "".join(
+        json.dumps({field: _json_value(row[field]) for field in fields}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+async def stream_rows(query, fields: List[str], export_format: ExportFormat) -> AsyncIterator[str]:
+    # Читает строки серверным курсором пачками и сразу отдаёт их клиенту,
+    # поэтому память не зависит от объёма выгрузки.
+    # Сессия открывается внутри генератора: она должна жить, пока отправляется ответ.
+    if export_format == "csv":
+        yield ",".join(fields) + "\r\n"
+
+    async with ReadSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.mappings().partitions(EXPORT_BATCH_SIZE):
+            yield _format_rows(rows, fields, export_format)
+
+
+def export_events(export_format: ExportFormat, after_id: int = 0) -> AsyncIterator[str]:
+    # Выгрузка всех мероприятий, включая архивные, по возрастанию ID; after_id — продолжение
+    # с последнего полученного ID. ID архивных мероприятий не пересекаются с events.
+    selects = [
+        select(
+            model.id, model.title, model.description, model.start_time, model.location, model.capacity,
+            model.tickets_sold, model.owner_id, models.User.username.label("owner_username"),
+        )
+        .outerjoin(models.User, model.owner_id == models.User.id)
+        .where(model.id > after_id)
+        for model in (models.Event, models.ArchivedEvent)
+    ]
+    events = union_all(*selects).subquery()
+    return stream_rows(select(events).order_by(events.c.id), EVENT_FIELDS, export_format)
+
+
+def export_attendees(event_id: int, export_format: ExportFormat, after_id: int = 0,
+                     model=models.Ticket) -> AsyncIterator[str]:
+    # Выгрузка участников мероприятия по возрастанию ID билета; after_id — последний полученный ticket_id.
+    # model — models.ArchivedTicket для архивного мероприятия.
+    query = (
+        select(model.id.label("ticket_id"), model.event_id, model.participant_id, models.User.username)
+        .join(models.User, model.participant_id == models.User.id)
+        .where(model.event_id == event_id, model.id > after_id)
+        .order_by(model.id)
+    )
+    return stream_rows(query, ATTENDEE_FIELDS, export_format)
@@ -0,0 +1,123 @@
+# app/service/hashing.py
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.service import telemetry
+
+
+def _hash(password_bytes: bytes) -> tuple[float, float, bytes]:
+    # Выполняется в пуле: хеширует пароль и возвращает время начала и конца работы.
+    started = time.monotonic()
+    hashed = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+    return started, time.monotonic(), hashed
+
+
+def _check(plain_password_bytes: bytes, hashed_password_bytes: bytes) -> tuple[float, float, bool]:
+    # Выполняется в пуле: сверяет пароль с хешем и возвращает время начала и конца работы.
+    started = time.monotonic()
+    matched = bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
+    return started, time.monotonic(), matched
+
+
+class Timing:
+    # Накопительная статистика по длительностям (в секундах).
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    # Выносит bcrypt в пул потоков или процессов, чтобы не блокировать event loop.
+    # Если очередь заполнена, новые запросы сразу получают 503.
+    def __init__(self, executor: str, workers: int, max_queue: int):
+        self.executor_kind = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.rejected = 0
+        self.hash_latency = Timing()
+        self.queue_wait = Timing()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            telemetry.PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Сервер перегружен, повторите попытку позже.")
+
+        self.pending += 1
+        enqueued = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started, finished, result = await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+        queue_wait = max(started - enqueued, 0.0)
+        self.queue_wait.observe(queue_wait)
+        self.hash_latency.observe(finished - started)
+        telemetry.PASSWORD_HASH_OPERATIONS.labels(operation).inc()
+        telemetry.PASSWORD_HASH_LATENCY.labels(operation).observe(finished - started)
+        telemetry.PASSWORD_HASH_QUEUE_WAIT.observe(queue_wait)
+        return result
+
+    async def hash(self, password: str) -> str:
+        # Получение хеша пароля.
+        hashed = await self._run("hash", _hash, password.encode('utf-8'))
+        return hashed.decode('utf-8')
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        # Сверяет обычный пароль с захешированным паролем.
+        return await self._run("verify", _check, plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "hash_latency": self.hash_latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor=settings.password_hash_executor,
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
@@ -0,0 +1,207 @@
+# app/service/jobs.py
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import exists, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.db import models
+from app.db.database import AsyncSessionLocal
+from app.service import telemetry
+
+# Очередь фоновых задач: задачи хранятся в таблице jobs и переживают рестарт,
+# выполняет их JobWorker — корутина внутри процесса приложения. Обработчики
+# регистрируются в сервисах декоратором job_handler.
+
+logger = logging.getLogger("app.jobs")
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[dict]]
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    # Регистрирует обработчик задачи. Обработчик получает свою сессию и payload,
+    # сам фиксирует транзакции и возвращает результат для GET /admin/jobs/{job_id}.
+    # Он может быть вызван повторно после сбоя, поэтому должен быть идемпотентным.
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return decorator
+
+
+async def enqueue(db: AsyncSession, kind: str, payload: dict, created_by: Optional[int] = None) -> models.Job:
+    # Ставит задачу в очередь и будит воркер этого процесса.
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Неизвестный тип задачи: {kind}")
+    job = models.Job(kind=kind, payload=payload, status="queued", attempts=0,
+                     max_attempts=settings.jobs_max_attempts, created_by=created_by)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    telemetry.JOBS.labels(kind, "queued").inc()
+    job_worker.notify()
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int) -> models.Job:
+    job = await db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Задача с ID {job_id} не найдена.")
+    return job
+
+
+class PeriodicJob:
+    # Задача, которую воркер ставит в очередь раз в interval секунд, если такая же ещё не ждёт.
+    def __init__(self, kind: str, interval: float, payload: dict):
+        self.kind = kind
+        self.interval = interval
+        self.payload = payload
+        self.next_run = 0.0
+
+
+class JobWorker:
+    # Выполняет задачи по одной. Задачу забирает UPDATE статуса; в Postgres выборка идёт
+    # с FOR UPDATE SKIP LOCKED, поэтому воркеры нескольких процессов не берут одну задачу дважды.
+    def __init__(self, session_factory: async_sessionmaker, poll_interval: float, retry_delay: float,
+                 stale_after: float):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.stale_after = stale_after
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._periodic: list[PeriodicJob] = []
+
+    def schedule(self, kind: str, interval: float, payload: Optional[dict] = None):
+        # Первый раз задача ставится сразу после старта воркера.
+        self._periodic.append(PeriodicJob(kind, interval, payload or {}))
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="job-worker")
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def stop(self):
+        # Дожидается окончания текущей задачи; невыполненные останутся в очереди.
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        try:
+            await self._requeue_stale()
+        except Exception:
+            logger.exception("Не удалось вернуть зависшие задачи в очередь")
+
+        while not self._stopping:
+            try:
+                await self._enqueue_due()
+                claimed = await self._claim()
+            except Exception:
+                logger.exception("Не удалось получить задачу из очереди")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._execute(*claimed)
+
+    async def _requeue_stale(self):
+        # Задачи, которые остались в running после падения процесса, выполняются заново.
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(models.Job)
+                .where(models.Job.status == "running", models.Job.started_at < stale_before)
+                .values(status="queued")
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _enqueue_due(self):
+        now = time.monotonic()
+        for periodic in self._periodic:
+            if periodic.next_run > now:
+                continue
+            periodic.next_run = now + periodic.interval
+            async with self.session_factory() as db:
+                # Воркеры нескольких процессов не должны плодить одинаковые задачи.
+                pending = await db.scalar(select(exists().where(
+                    models.Job.kind == periodic.kind, models.Job.status.in_(("queued", "running"))
+                )))
+                if not pending:
+                    await enqueue(db, periodic.kind, periodic.payload)
+
+    async def _claim(self) -> Optional[tuple[int, str, dict, int, int]]:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            query = (
+                select(models.Job)
+                .where(models.Job.status == "queued", models.Job.run_after <= now)
+                .order_by(models.Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = (await db.execute(query)).scalars().first()
+            if job is None:
+                return None
+            job.status = "running"
+            job.attempts += 1
+            job.started_at = now
+            claimed = (job.id, job.kind, job.payload, job.attempts, job.max_attempts)
+            await db.commit()
+            return claimed
+
+    async def _execute(self, job_id: int, kind: str, payload: dict, attempts: int, max_attempts: int):
+        handler = JOB_HANDLERS.get(kind)
+        values: dict[str, Any]
+        try:
+            if handler is None:
+                raise RuntimeError(f"Нет обработчика для задачи {kind}")
+            async with self.session_factory() as db:
+                result = await handler(db, payload)
+            values = {"status": "done", "result": result, "error": None,
+                      "finished_at": datetime.now(timezone.utc)}
+        except Exception as exc:
+            logger.exception("Задача %s (%s) завершилась ошибкой, попытка %s из %s", job_id, kind, attempts, max_attempts)
+            error = f"{type(exc).__name__}: {exc}"
+            if attempts < max_attempts:
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                values = {"status": "queued", "error": error,
+                          "run_after": datetime.now(timezone.utc) + timedelta(seconds=delay)}
+            else:
+                values = {"status": "failed", "error": error, "finished_at": datetime.now(timezone.utc)}
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(models.Job)
+                .where(models.Job.id == job_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        telemetry.JOBS.labels(kind, values["status"]).inc()
+
+
+job_worker = JobWorker(
+    AsyncSessionLocal,
+    poll_interval=settings.jobs_poll_interval,
+    retry_delay=settings.jobs_retry_delay,
+    stale_after=settings.jobs_stale_after,
+)
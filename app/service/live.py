@@ -0,0 +1,242 @@
+# app/service/live.py
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.db import models
+from app.db.database import AsyncSessionLocal, engine
+from app.service import telemetry
+
+# Рассылка изменений мероприятий подписчикам GET /events/live (Server-Sent Events).
+# Сервисы публикуют уведомление после коммита, брокер доставляет его хабам всех
+# воркеров, хаб — подписчикам своего процесса. Уведомление несёт version,
+# tickets_sold и capacity: остальное клиент перечитывает с If-None-Match.
+
+logger = logging.getLogger("app.live")
+
+CHANNEL = "event_updates"
+
+Dispatch = Callable[[dict], None]
+
+
+class Subscription:
+    # Подписка одного соединения. Буфер хранит только последнее уведомление по каждому
+    # мероприятию: медленный клиент получает свежее состояние, а память ограничена числом ID.
+    __slots__ = ("event_ids", "pending", "wakeup", "closed")
+
+    def __init__(self, event_ids: frozenset[int]):
+        self.event_ids = event_ids
+        self.pending: dict[int, dict] = {}
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    def push(self, message: dict):
+        self.pending[message["event_id"]] = message
+        self.wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self.wakeup.set()
+
+    async def next_batch(self, timeout: float) -> list[dict]:
+        # Ждёт уведомлений не дольше timeout; пустой список — время отправить heartbeat.
+        if not self.pending and not self.closed:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        self.wakeup.clear()
+        batch = list(self.pending.values())
+        self.pending.clear()
+        return batch
+
+
+class LocalBroker:
+    # Уведомления не выходят за пределы процесса: для одного воркера и тестов.
+    name = "local"
+
+    def __init__(self, dispatch: Dispatch):
+        self.dispatch = dispatch
+
+    async def start(self):
+        pass
+
+    async def publish(self, message: dict):
+        self.dispatch(message)
+
+    async def close(self):
+        pass
+
+
+class PostgresBroker:
+    # LISTEN/NOTIFY через основную базу: уведомление получают все воркеры, включая отправителя.
+    # Слушает отдельное соединение из пула движка. Пока оно переподключается, уведомления теряются;
+    # клиент всё равно сверяет состояние по version при следующем изменении.
+    name = "postgres"
+
+    def __init__(self, dispatch: Dispatch, engine: AsyncEngine, reconnect_delay: float = 1.0):
+        if engine.dialect.driver != "asyncpg":
+            raise RuntimeError("Для LISTEN/NOTIFY нужна база Postgres с драйвером asyncpg.")
+        self.dispatch = dispatch
+        self.engine = engine
+        self.reconnect_delay = reconnect_delay
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="live-listener")
+
+    async def _listen(self):
+        while True:
+            try:
+                async with self.engine.connect() as connection:
+                    raw_connection = await connection.get_raw_connection()
+                    listener = raw_connection.driver_connection
+                    lost = asyncio.Event()
+                    listener.add_termination_listener(lambda _: lost.set())
+                    await listener.add_listener(CHANNEL, self._on_notify)
+                    await lost.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Соединение LISTEN %s потеряно", CHANNEL)
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        self.dispatch(json.loads(payload))
+
+    async def publish(self, message: dict):
+        async with self.engine.connect() as connection:
+            await connection.execute(select(func.pg_notify(CHANNEL, json.dumps(message))))
+            await connection.commit()
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+def build_live_broker(backend: str, dispatch: Dispatch):
+    # Создаёт брокер уведомлений по имени из настроек.
+    if backend == "postgres":
+        return PostgresBroker(dispatch, engine)
+    return LocalBroker(dispatch)
+
+
+class LiveHub:
+    # Подписчики процесса по ID мероприятий. Простаивающее соединение — это одна корутина,
+    # ждущая asyncio.Event, поэтому на воркер помещаются десятки тысяч подписок.
+    def __init__(self, backend: str, max_connections: int, max_event_ids: int, heartbeat_interval: float):
+        self.broker = build_live_broker(backend, self.dispatch)
+        self.max_connections = max_connections
+        self.max_event_ids = max_event_ids
+        self.heartbeat_interval = heartbeat_interval
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self._connections = 0
+        self._closed = False
+
+    def check_subscription(self, event_ids: Iterable[int]) -> frozenset[int]:
+        # Проверки до начала ответа, чтобы клиент получил обычную ошибку, а не оборванный поток.
+        event_ids = frozenset(event_ids)
+        if not event_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Укажите хотя бы одно мероприятие.")
+        if len(event_ids) > self.max_event_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Можно подписаться не более чем на {self.max_event_ids} мероприятий.")
+        if self._closed or self._connections >= self.max_connections:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Слишком много подписок, повторите попытку позже.")
+        return event_ids
+
+    def subscribe(self, event_ids: frozenset[int]) -> Subscription:
+        subscription = Subscription(event_ids)
+        for event_id in event_ids:
+            self._subscribers.setdefault(event_id, set()).add(subscription)
+        self._connections += 1
+        telemetry.LIVE_CONNECTIONS.inc()
+        if self._closed:
+            subscription.close()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for event_id in subscription.event_ids:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[event_id]
+        self._connections -= 1
+        telemetry.LIVE_CONNECTIONS.dec()
+
+    def dispatch(self, message: dict):
+        # Доставка уведомления подписчикам этого процесса; вызывается брокером.
+        subscribers = self._subscribers.get(message["event_id"], ())
+        for subscription in subscribers:
+            subscription.push(message)
+        telemetry.LIVE_MESSAGES.inc(len(subscribers))
+
+    async def publish(self, event_id: int, version: int, tickets_sold: int, capacity: Optional[int]):
+        # Вызывается после коммита; ошибка доставки не должна отменять уже выполненное изменение.
+        message = {"event_id": event_id, "version": version, "tickets_sold": tickets_sold, "capacity": capacity}
+        try:
+            await self.broker.publish(message)
+        except Exception:
+            logger.exception("Не удалось опубликовать изменение мероприятия %s", event_id)
+
+    async def stream(self, event_ids: frozenset[int]) -> AsyncIterator[str]:
+        # Поток Server-Sent Events: сначала текущее состояние мероприятий, затем их изменения.
+        # Подписка оформляется до чтения состояния, поэтому изменение между ними не теряется.
+        subscription = self.subscribe(event_ids)
+        try:
+            yield f"retry: {int(self.heartbeat_interval * 1000)}\n\n"
+            async with AsyncSessionLocal() as session:
+                query = (
+                    select(models.Event.id.label("event_id"), models.Event.version, models.Event.tickets_sold,
+                           models.Event.capacity)
+                    .where(models.Event.id.in_(event_ids))
+                )
+                snapshot = [dict(row) for row in (await session.execute(query)).mappings()]
+            for message in snapshot:
+                if message["event_id"] not in subscription.pending:
+                    yield format_message(message)
+
+            while not subscription.closed:
+                batch = await subscription.next_batch(self.heartbeat_interval)
+                if not batch:
+                    yield ": ping\n\n"
+                    continue
+                yield "".join(format_message(message) for message in batch)
+        finally:
+            self.unsubscribe(subscription)
+
+    async def start(self):
+        self._closed = False
+        await self.broker.start()
+
+    async def close(self):
+        # Завершает потоки всех подписчиков: клиенты переподключатся к другому воркеру.
+        self._closed = True
+        for subscribers in list(self._subscribers.values()):
+            for subscription in subscribers:
+                subscription.close()
+        await self.broker.close()
+
+
+def format_message(message: dict) -> str:
+    return f"event: event_update\ndata: {json.dumps(message)}\n\n"
+
+
+live_hub = LiveHub(settings.live_backend, max_connections=settings.live_max_connections,
+                   max_event_ids=settings.live_max_event_ids, heartbeat_interval=settings.live_heartbeat_interval)
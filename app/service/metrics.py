@@ -0,0 +1,16 @@
+from app.config import settings
+from app.db.database import engine, pool_stats, read_engine
+import app.service.event as event_service
+from app.service import security
+from app.service.hashing import password_hasher
+
+
+def get_runtime_metrics() -> dict:
+    # Возвращает внутренние метрики процесса.
+    return {
+        "password_hashing": password_hasher.stats(),
+        "jwt_cache": {"enabled": settings.jwt_cache_enabled, **security.token_cache.stats()},
+        "event_cache": {"enabled": settings.event_cache_enabled, **event_service.event_cache.stats()},
+        "db_pool": pool_stats(engine),
+        "db_read_pool": pool_stats(read_engine) if read_engine is not engine else None,
+    }
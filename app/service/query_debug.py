@@ -0,0 +1,84 @@
+# app/service/query_debug.py
+
+import logging
+import os
+import sys
+from collections import Counter
+from typing import Optional
+
+import greenlet
+
+from app.config import settings
+
+# Поиск N+1 и медленных запросов для dev/staging (SQL_DEBUG_ENABLED=true).
+# Запросы, которые превысили бюджет SQL-запросов, выполнили один и тот же SQL
+# слишком много раз или содержат медленный запрос, пишутся в лог вместе с SQL,
+# временем и функцией сервиса, из которой он был выполнен.
+
+logger = logging.getLogger("app.sql_debug")
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+SQL_PREVIEW_LENGTH = 500
+
+
+def find_service_function() -> str:
+    # Ищет в стеке ближайшую функцию из app/service. Код SQLAlchemy выполняется
+    # в отдельном greenlet, поэтому после его стека проверяется стек родительского.
+    frame = sys._getframe(1)
+    current = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(SERVICE_DIR) and not filename.endswith(("telemetry.py", "query_debug.py")):
+                module = os.path.splitext(os.path.basename(filename))[0]
+                return f"{module}.{frame.f_code.co_name}"
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return "?"
+        frame = current.gr_frame
+
+
+class StatementRecord:
+    __slots__ = ("statement", "elapsed", "caller")
+
+    def __init__(self, statement: str, elapsed: float, caller: str):
+        self.statement = statement
+        self.elapsed = elapsed
+        self.caller = caller
+
+
+def request_problems(statements: list[StatementRecord]) -> list[str]:
+    # Причины, по которым запрос стоит показать разработчику.
+    problems = []
+    if len(statements) > settings.sql_debug_query_budget:
+        problems.append(f"{len(statements)} SQL-запросов при бюджете {settings.sql_debug_query_budget}")
+
+    repeats = Counter(record.statement for record in statements)
+    statement, count = repeats.most_common(1)[0] if repeats else ("", 0)
+    if count >= settings.sql_debug_repeat_threshold:
+        callers = sorted({record.caller for record in statements if record.statement == statement})
+        problems.append(f"один и тот же SQL выполнен {count} раз (возможно N+1) в {', '.join(callers)}")
+
+    slow = [record for record in statements if record.elapsed * 1000 >= settings.sql_debug_slow_query_ms]
+    if slow:
+        problems.append(f"{len(slow)} SQL-запросов дольше {settings.sql_debug_slow_query_ms:g} мс")
+    return problems
+
+
+def report_request(method: str, route: str, statements: Optional[list[StatementRecord]]):
+    # Вызывается по завершении HTTP-запроса и пишет предупреждение, если с ним что-то не так.
+    if not statements:
+        return
+    problems = request_problems(statements)
+    if not problems:
+        return
+
+    total_ms = sum(record.elapsed for record in statements) * 1000
+    lines = [f"{method} {route}: {'; '.join(problems)}; всего в базе {total_ms:.1f} мс"]
+    for record in statements:
+        sql = " ".join(record.statement.split())
+        if len(sql) > SQL_PREVIEW_LENGTH:
+            sql = sql[:SQL_PREVIEW_LENGTH] + "..."
+        lines.append(f"  {record.elapsed * 1000:8.2f} мс  {record.caller}: {sql}")
+    logger.warning("\n".join(lines))
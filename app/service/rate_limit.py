@@ -0,0 +1,152 @@
+# app/service/rate_limit.py
+
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.service import telemetry
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class Limit:
+    # Лимит вида "30/minute": до 30 запросов подряд, дальше — по одному раз в 2 секунды.
+    def __init__(self, burst: int, period: int):
+        self.burst = burst
+        self.rate = burst / period
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Limit"]:
+        # Пустая строка выключает лимит.
+        if not value:
+            return None
+        count, _, period = value.partition("/")
+        if period not in PERIODS or int(count) < 1:
+            raise ValueError(f"Некорректный лимит: {value!r}, ожидается например '30/minute'.")
+        return cls(burst=int(count), period=PERIODS[period])
+
+
+class MemoryRateLimitBackend:
+    # Корзины токенов в памяти процесса: лимит действует на каждый воркер отдельно.
+    name = "memory"
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        # Забирает токен из корзины; возвращает 0 или сколько секунд ждать следующего токена.
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def close(self):
+        self._buckets.clear()
+
+
+# Та же корзина токенов, но атомарно на стороне Redis. Время берётся у приложения:
+# часы воркеров должны быть синхронизированы.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    # Общие для всех воркеров корзины в Redis (или совместимом сервере).
+    name = "redis"
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            raise RuntimeError("Для лимитов в Redis установите пакет redis.")
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        retry_after = await self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()])
+        return float(retry_after)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def build_rate_limit_backend(backend: str, maxsize: int, redis_url: Optional[str] = None):
+    # Создаёт хранилище корзин по имени из настроек.
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("Для лимитов в Redis задайте адрес сервера.")
+        return RedisRateLimitBackend(redis_url)
+    return MemoryRateLimitBackend(maxsize=maxsize)
+
+
+rate_limit_backend = build_rate_limit_backend(settings.rate_limit_backend, maxsize=settings.rate_limit_maxsize,
+                                              redis_url=settings.rate_limit_redis_url)
+
+
+def client_ip(request: Request) -> str:
+    # Адрес клиента; X-Forwarded-For учитывается, только если приложение стоит за своим прокси.
+    if settings.rate_limit_trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(name: str, limit: Optional[Limit], key: str):
+    # Отклоняет запрос с 429, если корзина пуста.
+    if limit is None or not settings.rate_limit_enabled:
+        return
+    retry_after = await rate_limit_backend.take(f"{name}:{key}", limit.rate, limit.burst)
+    if retry_after > 0:
+        telemetry.RATE_LIMITED.labels(name).inc()
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            detail="Слишком много запросов, повторите попытку позже.",
+                            headers={"Retry-After": str(math.ceil(retry_after))})
+
+
+def limit_per_ip(name: str, value: str):
+    # Зависимость роутера: лимит на IP-адрес клиента. Выполняется раньше зависимостей
+    # эндпоинта, поэтому отклонённый запрос не доходит до базы и bcrypt.
+    limit = Limit.parse(value)
+
+    async def dependency(request: Request):
+        await enforce(name, limit, client_ip(request))
+
+    return dependency
+
+
+login_username_limit = Limit.parse(settings.rate_limit_login_per_username)
+
+
+async def limit_login_attempts(username: str):
+    # Лимит попыток входа в один аккаунт со всех адресов вместе — против перебора пароля.
+    await enforce("login_username", login_username_limit, username.lower())
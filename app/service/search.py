@@ -0,0 +1,86 @@
+# app/service/search.py
+
+import math
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models
+
+# Выражение должно совпадать с индексом ix_events_search (миграция 0005),
+# иначе Postgres не сможет использовать GIN-индекс.
+SEARCH_DOCUMENT = literal_column(
+    "to_tsvector('simple', coalesce(events.title, '') || ' ' || "
+    "coalesce(events.description, '') || ' ' || coalesce(events.location, ''))"
+)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def search_query(text: str):
+    # Поисковый запрос Postgres в синтаксисе веб-поиска: слова, "фразы", -исключения.
+    return func.websearch_to_tsquery(literal_column("'simple'"), text)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+class PythonSearchIndex:
+    # Инвертированный индекс в памяти для баз без полнотекстового поиска (SQLite в тестах).
+    # Перестраивается целиком при первом поиске после изменения мероприятий.
+    def __init__(self):
+        self._postings: dict[str, dict[int, int]] = {}
+        self._start_times: dict[int, datetime] = {}
+        self._stale = True
+
+    def mark_stale(self):
+        self._stale = True
+
+    async def ensure_built(self, db: AsyncSession):
+        if not self._stale:
+            return
+        query = select(models.Event.id, models.Event.title, models.Event.description,
+                       models.Event.location, models.Event.start_time)
+        postings: dict[str, dict[int, int]] = defaultdict(dict)
+        start_times: dict[int, datetime] = {}
+        for event_id, title, description, location, start_time in (await db.execute(query)).all():
+            for token in tokenize(title) + tokenize(description) + tokenize(location):
+                postings[token][event_id] = postings[token].get(event_id, 0) + 1
+            if start_time is not None and start_time.tzinfo is None:
+                start_time = start_time.replace(tzinfo=timezone.utc)
+            start_times[event_id] = start_time
+        self._postings = dict(postings)
+        self._start_times = start_times
+        self._stale = False
+
+    def search(self, text: str, active_after: Optional[datetime] = None) -> List[Tuple[float, int]]:
+        # Возвращает (релевантность, id) мероприятий, содержащих все слова запроса, по убыванию.
+        terms = set(tokenize(text))
+        if not terms:
+            return []
+        total = max(len(self._start_times), 1)
+        scores: Optional[dict[int, float]] = None
+        for term in terms:
+            matches = self._postings.get(term, {})
+            idf = math.log(1 + total / (1 + len(matches)))
+            term_scores = {event_id: count * idf for event_id, count in matches.items()}
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {event_id: score + term_scores[event_id]
+                          for event_id, score in scores.items() if event_id in term_scores}
+
+        results = [
+            (round(score, 6), event_id) for event_id, score in (scores or {}).items()
+            if active_after is None or (self._start_times.get(event_id) and self._start_times[event_id] > active_after)
+        ]
+        results.sort(reverse=True)
+        return results
+
+
+fallback_search_index = PythonSearchIndex()
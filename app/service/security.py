@@ -1,6 +1,7 @@
 # app/security.py
 
-import bcrypt
+import hashlib
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -8,32 +9,29 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from jose import JWTError, jwt
 
+from app.config import settings
 from app.db.models import User
 from app.schemas.schemas import TokenData
+from app.service import telemetry
+from app.service.cache import LRUTTLCache
+from app.service.hashing import password_hasher
 
 SECRET_KEY = "a_very_secret_key_for_event_platform"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
 
+token_cache = LRUTTLCache(maxsize=settings.jwt_cache_maxsize)
 
 
-def get_password_hash(password: str) -> str:
-    # Получение хеша пароля.
-    password_bytes = password.encode('utf-8')
 
-    salt = bcrypt.gensalt()
-    hashed_password_bytes = bcrypt.hashpw(password_bytes, salt)
+async def get_password_hash(password: str) -> str:
+    # Получение хеша пароля. Хеширование выполняется в пуле, а не в event loop.
+    return await password_hasher.hash(password)
 
-    return hashed_password_bytes.decode('utf-8')
 
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Сверяет обычный пароль с захешированным паролем.
-    plain_password_bytes = plain_password.encode('utf-8')
-
-    hashed_password_bytes = hashed_password.encode('utf-8')
-
-    return bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    # Сверяет обычный пароль с захешированным паролем в пуле.
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -55,14 +53,39 @@ def decode_token(token: str) -> TokenData:
 
     return TokenData.model_validate(payload)
 
+
+def get_token_user_id(token: str) -> int:
+    # Возвращает ID пользователя из токена. Уже проверенные токены берутся из кеша
+    # до истечения их exp, чтобы не проверять подпись на каждом запросе.
+    if not settings.jwt_cache_enabled:
+        user_id = int(decode_token(token).sub)
+        telemetry.JWT_CHECKS.labels("verified").inc()
+        return user_id
+
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    user_id = token_cache.get(key)
+    if user_id is not None:
+        telemetry.JWT_CHECKS.labels("cache_hit").inc()
+        return user_id
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
+    user_id = int(TokenData.model_validate(payload).sub)
+    telemetry.JWT_CHECKS.labels("verified").inc()
+
+    expires_at = time.time() + settings.jwt_cache_ttl
+    if "exp" in payload:
+        expires_at = min(expires_at, float(payload["exp"]))
+    token_cache.set(key, user_id, expires_at=expires_at)
+    return user_id
+
 async def check_jwt(credentials: HTTPBearer = Depends(HTTPBearer(auto_error=False))) -> int:
     # Проверяет токен пользователя, используется в роутерах.
     try:
         if not credentials:
             raise JWTError
-        token_data = decode_token(credentials.credentials)
-        return int(token_data.sub)
-    except JWTError:
+        return get_token_user_id(credentials.credentials)
+    except (JWTError, ValueError):
+        telemetry.JWT_CHECKS.labels("failed").inc()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Ошибка аутентификации")
 async def check_admin(user: User) -> User:
     # Проверяет, является ли пользователь администратором.
@@ -0,0 +1,182 @@
+# app/service/telemetry.py
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.service import query_debug
+
+# Метрики в формате Prometheus. При нескольких воркерах uvicorn задайте
+# PROMETHEUS_MULTIPROC_DIR (пустой каталог, общий для воркеров): тогда каждый
+# процесс пишет значения в свои файлы, а /metrics собирает их вместе.
+
+ROUTE_PREFIXES = ("/events", "/tickets", "/user", "/admin", "/auth")
+
+REQUESTS = Counter("http_requests_total", "HTTP-запросы по префиксу роутера, методу и статусу",
+                   ["prefix", "method", "status"])
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Время обработки HTTP-запроса",
+                            ["prefix", "method"])
+
+DB_QUERIES = Counter("db_queries_total", "SQL-запросы к базе", ["engine"])
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "Время выполнения SQL-запроса", ["engine"],
+                             buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+DB_QUERIES_PER_REQUEST = Histogram("http_request_db_queries", "Число SQL-запросов за один HTTP-запрос", ["prefix"],
+                                   buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100))
+DB_TIME_PER_REQUEST = Histogram("http_request_db_seconds", "Суммарное время SQL-запросов за один HTTP-запрос",
+                                ["prefix"])
+
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Соединения, выданные из пула", ["engine"],
+                            multiprocess_mode="livesum")
+DB_POOL_CAPACITY = Gauge("db_pool_capacity", "Максимум соединений пула (pool_size + max_overflow)", ["engine"],
+                         multiprocess_mode="livesum")
+
+PASSWORD_HASH_OPERATIONS = Counter("password_hash_operations_total", "Операции bcrypt", ["operation"])
+PASSWORD_HASH_LATENCY = Histogram("password_hash_duration_seconds", "Время работы bcrypt в пуле", ["operation"],
+                                  buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0))
+PASSWORD_HASH_QUEUE_WAIT = Histogram("password_hash_queue_wait_seconds", "Ожидание свободного воркера bcrypt")
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected_total", "Отказы bcrypt из-за переполненной очереди")
+
+JOBS = Counter("jobs_total", "Фоновые задачи по типу и статусу (queued, done, failed)", ["kind", "status"])
+
+RATE_LIMITED = Counter("rate_limited_total", "Запросы, отклонённые лимитом частоты", ["limit"])
+
+LIVE_CONNECTIONS = Gauge("live_connections", "Открытые подписки на изменения мероприятий",
+                         multiprocess_mode="livesum")
+LIVE_MESSAGES = Counter("live_messages_total", "Уведомления, поставленные подписчикам")
+
+JWT_CHECKS = Counter("jwt_checks_total", "Проверки JWT: cache_hit, verified или failed", ["result"])
+
+
+class RequestStats:
+    # Статистика обращений к базе в рамках одного HTTP-запроса.
+    # Тексты SQL запоминаются только в режиме отладки SQL.
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self, record_statements: bool = False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Optional[list] = [] if record_statements else None
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def route_prefix(path: str) -> str:
+    # Метки только по префиксам роутеров, чтобы число временных рядов не росло с числом ID в путях.
+    for prefix in ROUTE_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return prefix
+    return "other"
+
+
+class MetricsMiddleware:
+    # ASGI-middleware: время и статус каждого HTTP-запроса и число SQL-запросов в нём.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats(record_statements=settings.sql_debug_enabled)
+        token = current_request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_stats.reset(token)
+            prefix = route_prefix(scope["path"])
+            REQUESTS.labels(prefix, scope["method"], str(status_code)).inc()
+            REQUEST_LATENCY.labels(prefix, scope["method"]).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(prefix).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(prefix).observe(stats.db_time)
+            if stats.statements is not None:
+                route = scope.get("route")
+                query_debug.report_request(scope["method"], getattr(route, "path", scope["path"]), stats.statements)
+
+
+def instrument_engine(engine: AsyncEngine, name: str):
+    # Подписывается на события движка: длительность SQL-запросов и занятость пула.
+    sync_engine = engine.sync_engine
+    queries = DB_QUERIES.labels(name)
+    query_latency = DB_QUERY_LATENCY.labels(name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        queries.inc()
+        query_latency.observe(elapsed)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            if stats.statements is not None:
+                stats.statements.append(
+                    query_debug.StatementRecord(statement, elapsed, query_debug.find_service_function())
+                )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute не вызывается для упавшего запроса: время его старта снимается здесь,
+        # иначе список растёт на соединении пула с каждой ошибкой.
+        connection = exception_context.connection
+        if connection is not None and exception_context.execution_context is not None:
+            started = connection.info.get("query_started")
+            if started:
+                started.pop()
+
+    pool = sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            checked_out.inc()
+
+        @event.listens_for(pool, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            checked_out.dec()
+
+
+def record_pool_capacity(engine: AsyncEngine, name: str):
+    # Вызывается в каждом воркере после старта: значения gauge в многопроцессном режиме
+    # привязаны к pid, поэтому значение, записанное при импорте в мастере gunicorn, воркерам не достаётся.
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CAPACITY.labels(name).set(pool.size() + max(pool._max_overflow, 0))
+
+
+def render_metrics() -> tuple[bytes, str]:
+    # Текст для Prometheus; в многопроцессном режиме — сумма по всем воркерам.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    # Убирает значения gauge завершившегося воркера из многопроцессной статистики.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
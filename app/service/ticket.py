@@ -1,15 +1,19 @@
 # app/service/ticket.py
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import Integer, and_, delete, exists, func, literal, or_, select, union_all, update
+from sqlalchemy.engine import Row
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import joinedload
 from fastapi import HTTPException, status
 
 from app.db import models
 from app.schemas import schemas
 from . import event as event_service
+from .live import live_hub
 
 
 async def get_ticket_by_id(db: AsyncSession, ticket_id: int) -> models.Ticket | None:
@@ -26,34 +30,76 @@ async def get_ticket_by_id(db: AsyncSession, ticket_id: int) -> models.Ticket |
     return result.scalars().unique().first()
 
 
-async def get_ticket_by_event_and_participant(db: AsyncSession, event_id: int, participant_id: int) -> models.Ticket | None:
-    # Получение билета по ID мероприятия и ID участника
+# Состояние мероприятия, которое рассылается подписчикам после изменения числа билетов.
+LIVE_STATE_COLUMNS = (models.Event.version, models.Event.tickets_sold, models.Event.capacity)
+
+
+async def take_seat(db: AsyncSession, event_id: int) -> Optional[Row]:
+    # Атомарно увеличивает счётчик билетов, если на мероприятии есть свободное место.
+    # Возвращает новое состояние мероприятия для уведомления подписчиков или None, если мест нет.
     query = (
-        select(models.Ticket)
+        update(models.Event)
         .where(
-            models.Ticket.event_id == event_id,
-            models.Ticket.participant_id == participant_id
+            models.Event.id == event_id,
+            or_(models.Event.capacity.is_(None), models.Event.tickets_sold < models.Event.capacity)
         )
+        .values(tickets_sold=models.Event.tickets_sold + 1, version=models.Event.version + 1)
+        .returning(*LIVE_STATE_COLUMNS)
+        .execution_options(synchronize_session=False)
     )
-    result = await db.execute(query)
-    return result.scalars().first()
+    return (await db.execute(query)).first()
+
+
+async def release_seat(db: AsyncSession, event_id: int) -> Optional[Row]:
+    # Освобождает место на мероприятии после отмены регистрации.
+    query = (
+        update(models.Event)
+        .where(models.Event.id == event_id)
+        .values(tickets_sold=models.Event.tickets_sold - 1, version=models.Event.version + 1)
+        .returning(*LIVE_STATE_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(query)).first()
+
+
+def insert_for(db: AsyncSession, model):
+    # INSERT с поддержкой ON CONFLICT для диалекта текущей базы.
+    if db.bind.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return postgresql_insert(model)
 
 
 async def register_for_event(db: AsyncSession, schema: schemas.TicketCreate, participant_id: int) -> models.Ticket:
-    # Регистрация пользователя на мероприятие
-    event = await event_service.get_by_id(db, event_id=schema.event_id)
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие с таким ID не найдено.")
+    # Регистрация пользователя на мероприятие одним INSERT ... ON CONFLICT DO NOTHING.
+    # Повторную регистрацию отсекает уникальный индекс (event_id, participant_id), а не предварительная проверка.
+    # Место занимается условным UPDATE счётчика в той же транзакции: блокируется только строка мероприятия.
+    query = (
+        insert_for(db, models.Ticket)
+        .from_select(
+            ["event_id", "participant_id"],
+            select(models.Event.id, literal(participant_id, Integer)).where(models.Event.id == schema.event_id)
+        )
+        .on_conflict_do_nothing(index_elements=["event_id", "participant_id"])
+        .returning(models.Ticket.id)
+    )
+    ticket_id = (await db.execute(query)).scalar_one_or_none()
 
-    existing_ticket = await get_ticket_by_event_and_participant(db, event_id=schema.event_id, participant_id=participant_id)
-    if existing_ticket:
+    if ticket_id is None:
+        await db.rollback()
+        event_exists = await db.scalar(select(exists().where(models.Event.id == schema.event_id)))
+        if not event_exists:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Мероприятие с таким ID не найдено.")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Вы уже зарегистрированы на это мероприятие.")
 
-    new_ticket = models.Ticket(event_id=schema.event_id,participant_id=participant_id)
+    seat = await take_seat(db, event_id=schema.event_id)
+    if seat is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Свободных мест на мероприятии нет.")
 
-    db.add(new_ticket)
     await db.commit()
-    created_ticket = await get_ticket_by_id(db, ticket_id=new_ticket.id)
+    await event_service.invalidate_events(schema.event_id)
+    await live_hub.publish(schema.event_id, **seat._asdict())
+    created_ticket = await get_ticket_by_id(db, ticket_id=ticket_id)
 
     return created_ticket
 
@@ -67,23 +113,220 @@ async def cancel_registration(db: AsyncSession, ticket_id: int, user_id: int):
     if ticket_to_delete.participant_id != user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="У вас нет прав на отмену этой регистрации.")
 
-    if ticket_to_delete.event.start_time < datetime.now(timezone.utc):
+    if has_started(ticket_to_delete.event.start_time):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Невозможно отменить регистрацию на уже прошедшее мероприятие.")
 
     await db.delete(ticket_to_delete)
+    seat = await release_seat(db, event_id=ticket_to_delete.event_id)
     await db.commit()
+    await event_service.invalidate_events(ticket_to_delete.event_id)
+    if seat is not None:
+        await live_hub.publish(ticket_to_delete.event_id, **seat._asdict())
 
 
-async def get_tickets_by_user_id(db: AsyncSession, user_id: int) -> List[models.Ticket]:
-    # Получение всех билетов пользователя
+def has_started(start_time: datetime) -> bool:
+    if start_time.tzinfo is None:
+        # SQLite не хранит часовой пояс, время в базе — UTC.
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    return start_time < datetime.now(timezone.utc)
+
+
+def batch_item(status_code: int, detail: Optional[str] = None, **ids) -> dict:
+    return {**ids, "status_code": status_code, "detail": detail}
+
+
+async def register_for_events(db: AsyncSession, event_ids: List[int], participant_id: int) -> List[dict]:
+    # Пакетная регистрация с частичным успехом: одна выборка для всех проверок, один многострочный
+    # INSERT билетов и один UPDATE счётчиков. Строки мероприятий блокируются по возрастанию ID:
+    # параллельные пакеты не взаимоблокируются, а проверка свободных мест верна до коммита.
+    event_ids = list(dict.fromkeys(event_ids))
     query = (
-        select(models.Ticket)
-        .where(models.Ticket.participant_id == user_id)
-        .options(
-            joinedload(models.Ticket.event).options(
-                joinedload(models.Event.owner)
-            )
+        select(models.Event.id, models.Event.capacity, models.Event.tickets_sold, models.Ticket.id.label("ticket_id"))
+        .outerjoin(models.Ticket, and_(models.Ticket.event_id == models.Event.id,
+                                       models.Ticket.participant_id == participant_id))
+        .where(models.Event.id.in_(event_ids))
+        .order_by(models.Event.id)
+        .with_for_update(of=models.Event)
+    )
+    events = {row.id: row for row in await db.execute(query)}
+
+    results: dict[int, dict] = {}
+    candidates = []
+    for event_id in event_ids:
+        event = events.get(event_id)
+        if event is None:
+            results[event_id] = batch_item(404, "Мероприятие с таким ID не найдено.", event_id=event_id)
+        elif event.ticket_id is not None:
+            results[event_id] = batch_item(409, "Вы уже зарегистрированы на это мероприятие.",
+                                           event_id=event_id, ticket_id=event.ticket_id)
+        elif event.capacity is not None and event.tickets_sold >= event.capacity:
+            results[event_id] = batch_item(409, "Свободных мест на мероприятии нет.", event_id=event_id)
+        else:
+            candidates.append(event_id)
+
+    seats = []
+    if candidates:
+        query = (
+            insert_for(db, models.Ticket)
+            .values([{"event_id": event_id, "participant_id": participant_id} for event_id in candidates])
+            .on_conflict_do_nothing(index_elements=["event_id", "participant_id"])
+            .returning(models.Ticket.id, models.Ticket.event_id)
         )
+        created = {row.event_id: row.id for row in await db.execute(query)}
+        for event_id in candidates:
+            if event_id in created:
+                results[event_id] = batch_item(201, event_id=event_id, ticket_id=created[event_id])
+            else:
+                # Билет успел создать параллельный одиночный запрос.
+                results[event_id] = batch_item(409, "Вы уже зарегистрированы на это мероприятие.", event_id=event_id)
+
+        if created:
+            query = (
+                update(models.Event)
+                .where(models.Event.id.in_(created))
+                .values(tickets_sold=models.Event.tickets_sold + 1, version=models.Event.version + 1)
+                .returning(models.Event.id, *LIVE_STATE_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            seats = (await db.execute(query)).all()
+
+    await db.commit()
+    await publish_seats(seats)
+    return [results[event_id] for event_id in event_ids]
+
+
+async def cancel_registrations(db: AsyncSession, ticket_ids: List[int], user_id: int) -> List[dict]:
+    # Пакетная отмена регистраций с частичным успехом: одна выборка для проверок,
+    # один DELETE билетов и один UPDATE счётчиков. Блокировки — как в register_for_events.
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    query = (
+        select(models.Ticket.id, models.Ticket.event_id, models.Ticket.participant_id, models.Event.start_time)
+        .join(models.Event, models.Ticket.event_id == models.Event.id)
+        .where(models.Ticket.id.in_(ticket_ids))
+        .order_by(models.Event.id)
+        .with_for_update(of=models.Event)
     )
-    result = await db.execute(query)
-    return result.scalars().unique().all()
\ No newline at end of file
+    tickets = {row.id: row for row in await db.execute(query)}
+
+    results: dict[int, dict] = {}
+    candidates = []
+    for ticket_id in ticket_ids:
+        ticket = tickets.get(ticket_id)
+        if ticket is None:
+            results[ticket_id] = batch_item(404, "Регистрация (билет) не найдена.", ticket_id=ticket_id)
+        elif ticket.participant_id != user_id:
+            results[ticket_id] = batch_item(403, "У вас нет прав на отмену этой регистрации.", ticket_id=ticket_id)
+        elif has_started(ticket.start_time):
+            results[ticket_id] = batch_item(400, "Невозможно отменить регистрацию на уже прошедшее мероприятие.",
+                                            ticket_id=ticket_id, event_id=ticket.event_id)
+        else:
+            candidates.append(ticket_id)
+
+    seats = []
+    if candidates:
+        query = (
+            delete(models.Ticket)
+            .where(models.Ticket.id.in_(candidates), models.Ticket.participant_id == user_id)
+            .returning(models.Ticket.id, models.Ticket.event_id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = {row.id: row.event_id for row in await db.execute(query)}
+        for ticket_id in candidates:
+            if ticket_id in deleted:
+                results[ticket_id] = batch_item(204, ticket_id=ticket_id, event_id=deleted[ticket_id])
+            else:
+                results[ticket_id] = batch_item(404, "Регистрация (билет) не найдена.", ticket_id=ticket_id)
+
+        if deleted:
+            # Билет пользователя на мероприятие один, поэтому каждое мероприятие теряет ровно одно место.
+            query = (
+                update(models.Event)
+                .where(models.Event.id.in_(set(deleted.values())))
+                .values(tickets_sold=models.Event.tickets_sold - 1, version=models.Event.version + 1)
+                .returning(models.Event.id, *LIVE_STATE_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            seats = (await db.execute(query)).all()
+
+    await db.commit()
+    await publish_seats(seats)
+    return [results[ticket_id] for ticket_id in ticket_ids]
+
+
+async def publish_seats(seats: List[Row]):
+    # Сброс кеша карточек и уведомления подписчикам после пакетного изменения счётчиков.
+    if not seats:
+        return
+    await event_service.invalidate_events(*(seat.id for seat in seats))
+    for seat in seats:
+        await live_hub.publish(seat.id, version=seat.version, tickets_sold=seat.tickets_sold, capacity=seat.capacity)
+
+
+def user_tickets_select(user_id: int):
+    # Билеты пользователя вместе с архивными: UNION ALL одинаковых выборок из tickets и archived_tickets.
+    # ID билетов сохраняются при переносе в архив, поэтому не пересекаются.
+    selects = [
+        select(ticket_model.id, event_model.id.label("event_id"), event_model.title, event_model.start_time,
+               event_model.version, event_model.updated_at, models.User.id.label("participant_id"),
+               models.User.username)
+        .join(event_model, ticket_model.event_id == event_model.id)
+        .join(models.User, ticket_model.participant_id == models.User.id)
+        .where(ticket_model.participant_id == user_id)
+        for ticket_model, event_model in ((models.Ticket, models.Event),
+                                          (models.ArchivedTicket, models.ArchivedEvent))
+    ]
+    return union_all(*selects).subquery()
+
+
+async def get_tickets_version(db: AsyncSession, user_id: int) -> tuple:
+    # Версия списка билетов пользователя для ETag: число и ID билетов, версии и время изменения мероприятий.
+    # Имя пользователя тоже входит в ответ, поэтому участвует в версии.
+    tickets = user_tickets_select(user_id)
+    query = select(func.count(tickets.c.id), func.sum(tickets.c.id), func.sum(tickets.c.version),
+                   func.max(tickets.c.updated_at), func.max(tickets.c.username))
+    return tuple((await db.execute(query)).one())
+
+
+async def get_tickets_by_user_id(db: AsyncSession, user_id: int) -> List[dict]:
+    # Получение всех билетов пользователя, включая архивные, простыми строками по схеме schemas.Ticket
+    tickets = user_tickets_select(user_id)
+    result = await db.execute(select(tickets).order_by(tickets.c.id))
+    return [
+        {
+            "id": row.id,
+            "event": {"id": row.event_id, "title": row.title, "start_time": row.start_time},
+            "participant": {"id": row.participant_id, "username": row.username},
+        }
+        for row in result
+    ]
+
+async def get_attendees_page(db: AsyncSession, event_id: int, limit: int = 50,
+                             cursor: Optional[str] = None) -> Tuple[List[models.Ticket], Optional[str]]:
+    # Страница участников мероприятия в порядке регистрации, курсор — ID последнего билета на странице.
+    # Участники архивного мероприятия читаются из архива; это выясняется, только если в tickets пусто.
+    try:
+        after_id = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор.")
+
+    async def fetch(model) -> list:
+        query = (
+            select(model)
+            .where(model.event_id == event_id, model.id > after_id)
+            .options(joinedload(model.participant).load_only(models.User.id, models.User.username))
+            .order_by(model.id)
+            .limit(limit + 1)
+        )
+        return list((await db.execute(query)).scalars().all())
+
+    tickets = await fetch(models.Ticket)
+    if not tickets and not await event_service.get_by_id(db, event_id=event_id, profile="bare"):
+        if not await event_service.get_archived_by_id(db, event_id=event_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Мероприятие с ID {event_id} не найдено.")
+        tickets = await fetch(models.ArchivedTicket)
+
+    next_cursor = None
+    if len(tickets) > limit:
+        tickets = tickets[:limit]
+        next_cursor = str(tickets[-1].id)
+    return tickets, next_cursor
@@ -1,33 +1,41 @@
-from typing import List
+from typing import List, Literal
 
 from rich import status
-from sqlalchemy import select
+from sqlalchemy import exists, select, update as update_query
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import status, HTTPException
-from sqlalchemy.orm import joinedload
+from fastapi import Depends, Request, status, HTTPException
+from sqlalchemy.orm import load_only, selectinload
 import app.service.event as event_service
 
 from app.db import models
+from app.db.database import get_db
 from app.schemas import schemas
-from app.service import security
+from app.service import jobs, security
+
+UserProfile = Literal["auth", "summary", "full"]
 
 async def update_username(db: AsyncSession, current_user: models.User, new_username: str) -> models.User:
     # Обновление имени пользователя
-    existing_user = await get_by_username(db, username=new_username)
-    if existing_user and existing_user.id != current_user.id:
+    username_taken = await db.scalar(
+        select(exists().where(models.User.username == new_username, models.User.id != current_user.id))
+    )
+    if username_taken:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Это имя пользователя уже занято.")
 
     current_user.username = new_username
+    event_ids = await event_service.touch_owner_events(db, owner_id=current_user.id)
 
     updated_user = await update(db, user=current_user)
-    return updated_user
+    # Карточки мероприятий в кеше содержат имя владельца
+    await event_service.invalidate_events(*event_ids)
+    return await get_by_id(db, user_id=updated_user.id, profile="full")
 
 
 async def update_password(db: AsyncSession, current_user: models.User, old_password: str, new_password: str) -> models.User:
-    if not security.verify_password(old_password, current_user.hashed_password):
+    if not await security.verify_password(old_password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный текущий пароль.")
 
-    new_hashed_password = security.get_password_hash(new_password)
+    new_hashed_password = await security.get_password_hash(new_password)
 
     current_user.hashed_password = new_hashed_password
 
@@ -35,31 +43,69 @@ async def update_password(db: AsyncSession, current_user: models.User, old_passw
     return updated_user
 
 
-async def get_by_id(db: AsyncSession, user_id: int) -> models.User | None:
-    # Получение пользователя по ID с созданными событиями и билетами
+def user_load_options(profile: UserProfile) -> list:
+    # Опции загрузки пользователя под конкретный сценарий:
+    # auth — только поля для проверки прав и пароля,
+    # summary — поля без хеша пароля и без связей,
+    # full — созданные мероприятия и билеты, в том числе архивные (для схемы schemas.User).
+    if profile == "auth":
+        return [load_only(models.User.id, models.User.username, models.User.hashed_password,
+                          models.User.is_admin, models.User.banned)]
+    if profile == "summary":
+        return [load_only(models.User.id, models.User.username, models.User.is_admin, models.User.banned)]
+    return [
+        selectinload(models.User.created_events).load_only(
+            models.Event.id, models.Event.title, models.Event.start_time
+        ),
+        selectinload(models.User.tickets).selectinload(models.Ticket.event).load_only(
+            models.Event.id, models.Event.title, models.Event.start_time
+        ),
+        selectinload(models.User.archived_events).load_only(
+            models.ArchivedEvent.id, models.ArchivedEvent.title, models.ArchivedEvent.start_time
+        ),
+        selectinload(models.User.archived_tickets).selectinload(models.ArchivedTicket.event).load_only(
+            models.ArchivedEvent.id, models.ArchivedEvent.title, models.ArchivedEvent.start_time
+        ),
+    ]
+
+
+async def get_by_id(db: AsyncSession, user_id: int, profile: UserProfile = "full") -> models.User | None:
+    # Получение пользователя по ID, набор загружаемых данных задаётся профилем
     query = (
         select(models.User)
         .where(models.User.id == user_id)
-        .options(
-            joinedload(models.User.created_events),
-            joinedload(models.User.tickets)
-        )
+        .options(*user_load_options(profile))
     )
     result = await db.execute(query)
-    return result.scalars().unique().first()
-
-async def get_by_username(db: AsyncSession, username: str) -> models.User | None:
-    # Получение пользователя по имени с созданными событиями и билетами
+    return result.scalars().first()
+
+async def get_current_user(request: Request, user_id: int = Depends(security.check_jwt),
+                           db: AsyncSession = Depends(get_db)) -> models.User:
+    # Зависимость: текущий пользователь, загруженный один раз за запрос (профиль auth).
+    # Объект кешируется в request.state и живёт в той же сессии, что и обработчик.
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
+
+    current_user = await get_by_id(db, user_id=user_id, profile="auth")
+    if not current_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Ошибка аутентификации")
+    request.state.current_user = current_user
+    return current_user
+
+async def get_current_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
+    # Зависимость: текущий пользователь, если он администратор.
+    return await security.check_admin(current_user)
+
+async def get_by_username(db: AsyncSession, username: str, profile: UserProfile = "full") -> models.User | None:
+    # Получение пользователя по имени, набор загружаемых данных задаётся профилем
     query = (
         select(models.User)
         .where(models.User.username == username)
-        .options(
-            joinedload(models.User.created_events),
-            joinedload(models.User.tickets).options(joinedload(models.Ticket.event))
-        )
+        .options(*user_load_options(profile))
     )
     result = await db.execute(query)
-    return result.scalars().unique().first()
+    return result.scalars().first()
 
 async def update(db: AsyncSession, user: models.User) -> models.User:
     # Обновление пользователя
@@ -69,41 +115,71 @@ async def update(db: AsyncSession, user: models.User) -> models.User:
     return user
 
 
-async def ban_user(db: AsyncSession, user_id_to_ban: int, admin_id: int) -> models.User:
-    # Блокировка пользователя и удаляет его события
-    admin_user = await get_by_id(db, admin_id)
-    await security.check_admin(admin_user)
-
+async def apply_ban(db: AsyncSession, user_ids: List[int]) -> dict:
+    # Блокирует пользователей и удаляет их мероприятия фиксированным числом запросов.
+    # Транзакцию фиксирует вызывающий код.
+    requested_ids = set(user_ids)
+    result = await db.execute(
+        update_query(models.User)
+        .where(models.User.id.in_(requested_ids))
+        .values(banned=True)
+        .returning(models.User.id)
+        .execution_options(synchronize_session=False)
+    )
+    banned_ids = list(result.scalars().all())
+    deleted_event_ids, deleted_tickets = await event_service.delete_events_by_owners(db, owner_ids=banned_ids)
+    return {
+        "banned_users": len(banned_ids),
+        "deleted_events": len(deleted_event_ids),
+        "deleted_tickets": deleted_tickets,
+        "not_found": sorted(requested_ids - set(banned_ids)),
+        "deleted_event_ids": deleted_event_ids,
+    }
+
+
+async def ban_user(db: AsyncSession, user_id_to_ban: int, admin_user: models.User) -> models.Job:
+    # Ставит блокировку пользователя и удаление его мероприятий в очередь
     if user_id_to_ban == admin_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Администратор не может заблокировать сам себя."
         )
 
-    user_to_ban = await get_by_id(db, user_id=user_id_to_ban)
-    if not user_to_ban:
+    user_exists = await db.scalar(select(exists().where(models.User.id == user_id_to_ban)))
+    if not user_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Пользователь для блокировки не найден."
         )
 
-    await event_service.delete_events_by_owner(db, owner_id=user_id_to_ban)
+    return await jobs.enqueue(db, "ban_users", {"user_ids": [user_id_to_ban]}, created_by=admin_user.id)
 
 
-    user_to_ban.banned = True
-    db.add(user_to_ban)
+async def ban_users(db: AsyncSession, user_ids: List[int], admin_user: models.User) -> models.Job:
+    # Ставит массовую блокировку пользователей с удалением их мероприятий в очередь
+    if admin_user.id in user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Администратор не может заблокировать сам себя."
+        )
+
+    return await jobs.enqueue(db, "ban_users", {"user_ids": sorted(set(user_ids))}, created_by=admin_user.id)
 
-    await db.commit()
 
-    await db.refresh(user_to_ban)
-    return user_to_ban
+@jobs.job_handler("ban_users")
+async def run_ban_users_job(db: AsyncSession, payload: dict) -> dict:
+    # Блокировка выполняется одной транзакцией; повтор после сбоя безопасен.
+    # Результат задачи имеет вид schemas.BanUsersResult.
+    result = await apply_ban(db, user_ids=payload["user_ids"])
+    await db.commit()
+    await event_service.invalidate_events(*result.pop("deleted_event_ids"))
+    return schemas.BanUsersResult.model_validate(result).model_dump()
 
-async def get_all_users(db: AsyncSession, user_id: int) -> List[models.User]:
+async def get_all_users(db: AsyncSession) -> List[models.User]:
     # Возвращает список всех пользователей системы.
-    user = await get_by_id(db, user_id=user_id)
-    await security.check_admin(user)
     query = (
         select(models.User)
+        .options(*user_load_options("summary"))
         .order_by(models.User.id)
     )
     result = await db.execute(query)
@@ -0,0 +1,347 @@
+# benchmarks/run.py
+# Нагрузочный прогон API: наполняет локальную базу через сервисный слой и гоняет
+# сценарии по всем роутерам, результат — JSON с пропускной способностью и p50/p95/p99.
+#
+# python -m benchmarks.run --database-url sqlite+aiosqlite:///./bench.db --output bench.json
+#
+# База пересоздаётся при каждом запуске — используйте только локальную тестовую базу.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+SCENARIOS = ("login_storm", "feed_browse", "registration_rush", "account", "admin")
+PASSWORD = "bench-password"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон API мероприятий.")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench.db",
+                        help="Локальная база (Postgres или SQLite); будет пересоздана.")
+    parser.add_argument("--base-url", default=None,
+                        help="Адрес запущенного сервера. По умолчанию приложение вызывается в процессе.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--tickets", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=300, help="Запросов на сценарий.")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Сценарий (можно несколько). По умолчанию — все.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Файл для JSON-отчёта. По умолчанию — stdout.")
+    return parser.parse_args(argv)
+
+
+def percentile(values: list[float], q: float) -> float:
+    # Перцентиль методом ближайшего ранга.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Recorder:
+    # Собирает задержки и коды ответов по шаблонам маршрутов.
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route: str, status_code: int, seconds: float):
+        self.latencies[route].append(seconds * 1000)
+        self.statuses[route][status_code] += 1
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        total = 0
+        errors = 0
+        for route, values in sorted(self.latencies.items()):
+            total += len(values)
+            errors += sum(count for code, count in self.statuses[route].items() if code >= 500)
+            routes[route] = {
+                "count": len(values),
+                "throughput_rps": round(len(values) / duration, 2) if duration else 0.0,
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "max_ms": round(max(values), 3),
+                "status": {str(code): count for code, count in sorted(self.statuses[route].items())},
+            }
+        return {
+            "duration_s": round(duration, 3),
+            "requests": total,
+            "throughput_rps": round(total / duration, 2) if duration else 0.0,
+            "server_errors": errors,
+            "routes": routes,
+        }
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace, client, dataset: dict):
+        self.args = args
+        self.client = client
+        self.data = dataset
+        self.random = random.Random(args.seed)
+        self.counter = 0
+
+    def auth(self, user_id: int) -> dict:
+        return {"Authorization": f"Bearer {self.data['tokens'][user_id]}"}
+
+    def next_id(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    async def call(self, recorder: Recorder, route: str, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, path, **kwargs)
+        recorder.record(route, response.status_code, time.perf_counter() - started)
+        return response
+
+    # Операции сценариев. Каждая выбирает данные случайно и делает один или несколько запросов.
+
+    async def op_login(self, rec: Recorder):
+        user_id = self.random.choice(self.data["users"])
+        await self.call(rec, "POST /auth/login", "POST", "/auth/login",
+                        json={"username": self.data["usernames"][user_id], "password": PASSWORD})
+
+    async def op_register(self, rec: Recorder):
+        await self.call(rec, "POST /auth/register", "POST", "/auth/register",
+                        json={"username": f"newuser{self.args.seed}_{self.next_id()}", "password": PASSWORD})
+
+    async def op_feed(self, rec: Recorder):
+        headers = self.auth(self.random.choice(self.data["users"]))
+        response = await self.call(rec, "GET /events/active", "GET", "/events/active", headers=headers)
+        cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+        if cursor and self.random.random() < 0.5:
+            await self.call(rec, "GET /events/active", "GET", "/events/active",
+                            params={"cursor": cursor}, headers=headers)
+
+    async def op_history(self, rec: Recorder):
+        headers = self.auth(self.random.choice(self.data["users"]))
+        await self.call(rec, "GET /events/history", "GET", "/events/history", headers=headers)
+
+    async def op_event_detail(self, rec: Recorder):
+        headers = self.auth(self.random.choice(self.data["users"]))
+        event_id = self.random.choice(self.data["events"])
+        await self.call(rec, "GET /events/{event_id}", "GET", f"/events/{event_id}", headers=headers)
+
+    async def op_my_events(self, rec: Recorder):
+        headers = self.auth(self.random.choice(self.data["users"]))
+        await self.call(rec, "GET /user/events", "GET", "/user/events", headers=headers)
+        await self.call(rec, "GET /user/events/active", "GET", "/user/events/active", headers=headers)
+
+    async def op_my_tickets(self, rec: Recorder):
+        headers = self.auth(self.random.choice(self.data["users"]))
+        await self.call(rec, "GET /tickets", "GET", "/tickets", headers=headers)
+
+    async def op_register_ticket(self, rec: Recorder):
+        user_id = self.random.choice(self.data["users"])
+        event_id = self.random.choice(self.data["hot_events"])
+        response = await self.call(rec, "POST /tickets/", "POST", "/tickets/",
+                                   json={"event_id": event_id}, headers=self.auth(user_id))
+        if response.status_code == 201 and self.random.random() < 0.3:
+            ticket_id = response.json()["id"]
+            await self.call(rec, "DELETE /tickets/{ticket_id}", "DELETE", f"/tickets/{ticket_id}",
+                            headers=self.auth(user_id))
+
+    async def op_create_event(self, rec: Recorder):
+        user_id = self.random.choice(self.data["users"])
+        start_time = datetime.now(timezone.utc) + timedelta(days=self.random.randint(1, 60))
+        response = await self.call(rec, "POST /events", "POST", "/events", headers=self.auth(user_id), json={
+            "title": f"Bench event {self.next_id()}", "description": "Создано нагрузочным тестом",
+            "start_time": start_time.isoformat(), "location": self.random.choice(self.data["locations"]),
+        })
+        if response.status_code == 200:
+            event_id = response.json()["id"]
+            await self.call(rec, "PATCH /events/{event_id}", "PATCH", f"/events/{event_id}",
+                            headers=self.auth(user_id), json={"title": f"Bench event {self.next_id()}"})
+
+    async def op_change_username(self, rec: Recorder):
+        user_id = self.random.choice(self.data["users"])
+        await self.call(rec, "PATCH /user/username", "PATCH", "/user/username", headers=self.auth(user_id),
+                        json={"username": f"renamed{self.args.seed}_{self.next_id()}"})
+
+    async def op_change_password(self, rec: Recorder):
+        user_id = self.random.choice(self.data["users"])
+        await self.call(rec, "PATCH /user/password", "PATCH", "/user/password", headers=self.auth(user_id),
+                        json={"old_password": PASSWORD, "new_password": PASSWORD})
+
+    async def op_admin_read(self, rec: Recorder):
+        headers = self.auth(self.data["admin"])
+        await self.call(rec, "GET /admin/users", "GET", "/admin/users", headers=headers)
+        await self.call(rec, "GET /admin/metrics", "GET", "/admin/metrics", headers=headers)
+
+    async def op_admin_delete_event(self, rec: Recorder):
+        if not self.data["victim_events"]:
+            return await self.op_admin_read(rec)
+        event_id = self.data["victim_events"].pop()
+        await self.call(rec, "DELETE /admin/events/{event_id}", "DELETE", f"/admin/events/{event_id}",
+                        headers=self.auth(self.data["admin"]))
+
+    async def op_admin_ban(self, rec: Recorder):
+        if not self.data["victim_users"]:
+            return await self.op_admin_read(rec)
+        user_id = self.data["victim_users"].pop()
+        await self.call(rec, "DELETE /admin/users/{user_id}/ban", "DELETE", f"/admin/users/{user_id}/ban",
+                        headers=self.auth(self.data["admin"]))
+
+    async def op_admin_register(self, rec: Recorder):
+        await self.call(rec, "POST /admin/register", "POST", "/admin/register", params={"password": "admin"},
+                        json={"username": f"benchadmin{self.args.seed}_{self.next_id()}", "password": PASSWORD})
+
+    def mix(self, scenario: str) -> list[tuple]:
+        # Доли операций в сценарии.
+        return {
+            "login_storm": [(self.op_login, 90), (self.op_register, 10)],
+            "feed_browse": [(self.op_feed, 40), (self.op_history, 10), (self.op_event_detail, 30),
+                            (self.op_my_events, 10), (self.op_my_tickets, 10)],
+            "registration_rush": [(self.op_register_ticket, 80), (self.op_my_tickets, 10), (self.op_create_event, 10)],
+            "account": [(self.op_change_username, 50), (self.op_change_password, 50)],
+            "admin": [(self.op_admin_read, 60), (self.op_admin_delete_event, 20), (self.op_admin_ban, 15),
+                      (self.op_admin_register, 5)],
+        }[scenario]
+
+    async def run_scenario(self, scenario: str) -> dict:
+        operations, weights = zip(*self.mix(scenario))
+        plan = self.random.choices(operations, weights=weights, k=self.args.requests)
+        recorder = Recorder()
+        queue: asyncio.Queue = asyncio.Queue()
+        for operation in plan:
+            queue.put_nowait(operation)
+
+        async def worker():
+            while not queue.empty():
+                operation = queue.get_nowait()
+                await operation(recorder)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+        return recorder.report(time.perf_counter() - started)
+
+
+async def seed(args: argparse.Namespace) -> dict:
+    # Наполняет базу через сервисный слой. Хеш пароля считается один раз и переиспользуется.
+    import bcrypt
+    from fastapi import HTTPException
+
+    from app.db.database import AsyncSessionLocal, engine
+    from app.db.models import Base
+    from app.schemas import schemas
+    import app.service.auth as auth_service
+    import app.service.event as event_service
+    import app.service.ticket as ticket_service
+
+    rnd = random.Random(args.seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    hashed_password = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    locations = ["Moscow", "Saint Petersburg", "Kazan", "Novosibirsk", "Online"]
+    now = datetime.now(timezone.utc)
+    data = {"users": [], "usernames": {}, "tokens": {}, "events": [], "hot_events": [],
+            "victim_users": [], "victim_events": [], "locations": locations}
+
+    async with AsyncSessionLocal() as db:
+        admin = await auth_service.create_admin(db, username="benchadmin", hashed_password=hashed_password)
+        data["admin"] = admin.id
+
+        for i in range(args.users):
+            user = await auth_service.create(db, username=f"benchuser{i}", hashed_password=hashed_password)
+            data["users"].append(user.id)
+            data["usernames"][user.id] = user.username
+        # Пользователи для блокировки в сценарии admin — отдельно, чтобы не ломать остальные сценарии.
+        for i in range(max(args.users // 10, 1)):
+            user = await auth_service.create(db, username=f"benchvictim{i}", hashed_password=hashed_password)
+            data["victim_users"].append(user.id)
+
+        for i in range(args.events):
+            # Примерно пятая часть мероприятий — в прошлом, для /events/history.
+            offset = timedelta(hours=rnd.randint(-24 * 90, 24 * 365))
+            if i % 5 != 0:
+                offset = abs(offset) + timedelta(hours=1)
+            owner_id = rnd.choice(data["users"] + data["victim_users"])
+            event = await event_service.create_event(db, schema=schemas.EventCreate(
+                title=f"Event number {i}", description="Мероприятие для нагрузочного теста",
+                start_time=now + offset, location=rnd.choice(locations),
+            ), user_id=owner_id)
+            if event.start_time.replace(tzinfo=event.start_time.tzinfo or timezone.utc) > now:
+                data["events"].append(event.id)
+            if owner_id in data["victim_users"]:
+                continue
+            if len(data["victim_events"]) < max(args.events // 20, 1) and i % 7 == 3:
+                data["victim_events"].append(event.id)
+        data["events"] = [event_id for event_id in data["events"] if event_id not in data["victim_events"]]
+        data["hot_events"] = data["events"][:10]
+
+        for _ in range(args.tickets):
+            try:
+                await ticket_service.register_for_event(
+                    db, schema=schemas.TicketCreate(event_id=rnd.choice(data["events"])),
+                    participant_id=rnd.choice(data["users"]),
+                )
+            except HTTPException:
+                pass
+
+    for user_id in data["users"] + [data["admin"]]:
+        data["tokens"][user_id] = (await auth_service.create_user_token(user_id)).access_token
+    return data
+
+
+async def main(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from app.main import app
+
+    seed_started = time.perf_counter()
+    dataset = await seed(args)
+    seed_duration = time.perf_counter() - seed_started
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+                                   base_url="http://bench", timeout=60)
+
+    report = {
+        "config": {
+            "database": args.database_url.split("://", 1)[0],
+            "target": args.base_url or "in-process",
+            "users": args.users, "events": args.events, "tickets": args.tickets,
+            "requests_per_scenario": args.requests, "concurrency": args.concurrency, "seed": args.seed,
+            "seed_duration_s": round(seed_duration, 3),
+        },
+        "scenarios": {},
+    }
+    async with client:
+        bench = Bench(args, client, dataset)
+        for scenario in args.scenario or SCENARIOS:
+            report["scenarios"][scenario] = await bench.run_scenario(scenario)
+
+    from app.db.database import dispose_engines
+    await dispose_engines()
+    return report
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    # Настройки приложения читаются при импорте, поэтому окружение задаётся до него.
+    os.environ["DATABASE_URL"] = arguments.database_url
+    os.environ.setdefault("DB_ECHO", "false")
+    # Все запросы прогона идут с одного адреса: с лимитами отчёт измерял бы ответы 429.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    result = asyncio.run(main(arguments))
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        sys.stdout.write(output + "\n")
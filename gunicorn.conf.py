@@ -0,0 +1,54 @@
+# gunicorn.conf.py
+# Продакшен-профиль: gunicorn app.main:app (файл подхватывается из текущего каталога).
+
+import os
+
+
+def cpu_count() -> int:
+    # Учитывает ограничение CPU контейнера через affinity.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+# Воркеры асинхронные, bcrypt вынесен в пул: одного процесса на ядро достаточно.
+workers = int(os.environ.get("WEB_CONCURRENCY", cpu_count()))
+worker_class = "app.server.AppUvicornWorker"
+# Приложение импортируется в мастере один раз до fork: ошибки импорта видны сразу,
+# воркеры стартуют быстрее. Соединения, пулы и задачи открываются в lifespan каждого воркера.
+preload_app = True
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+keepalive = 5
+accesslog = "-"
+
+
+def prepare_metrics_dir():
+    # Выполняется при чтении конфига, до импорта приложения в мастере (preload_app):
+    # каталог должен существовать к моменту создания метрик, а файлы прошлого запуска
+    # не должны попасть в сумму по воркерам. Позже чистить нельзя — удалятся файлы мастера.
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".db"):
+                os.remove(os.path.join(directory, name))
+
+
+prepare_metrics_dir()
+
+
+def post_fork(server, worker):
+    # Соединения, открытые в мастере, не должны использоваться воркерами после fork.
+    from app.db.database import engine, read_engine
+    engine.sync_engine.dispose(close=False)
+    if read_engine is not engine:
+        read_engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Gauge упавшего воркера убираются из суммы, даже если он не успел выполнить shutdown.
+    from app.service import telemetry
+    telemetry.mark_process_dead(worker.pid)
@@ -0,0 +1,57 @@
+# migrations/env.py
+# Миграции запускаются один раз перед стартом воркеров: alembic upgrade head.
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.db.models import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    # Генерирует SQL без подключения к базе: alembic upgrade head --sql
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, transaction_per_migration=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    # lock_timeout не даёт DDL долго висеть в очереди за блокировками и блокировать рабочий трафик.
+    database_url = make_url(settings.database_url)
+    connect_args = {}
+    if database_url.get_driver_name() == "asyncpg":
+        connect_args["server_settings"] = {"lock_timeout": settings.migration_lock_timeout}
+
+    connectable = create_async_engine(database_url, poolclass=pool.NullPool, connect_args=connect_args)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,49 @@
+"""Исходная схема: пользователи, мероприятия, билеты
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Базы, созданные раньше через create_all, нужно пометить этой ревизией:
+alembic stamp 0001
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("banned", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+    )
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("location", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_table(
+        "tickets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("events.id"), nullable=False),
+        sa.Column("participant_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tickets")
+    op.drop_table("events")
+    op.drop_table("users")
@@ -0,0 +1,56 @@
+"""Уникальность билета (event_id, participant_id), вместимость и счётчик билетов
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Уникальный индекс строится CONCURRENTLY и затем превращается в ограничение,
+CHECK добавляется как NOT VALID и проверяется отдельно — так таблицы
+не блокируются на запись на время сканирования.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Дубликаты могли появиться до уникального ограничения: оставляем самый ранний билет.
+        op.execute(
+            "DELETE FROM tickets t USING tickets d "
+            "WHERE t.event_id = d.event_id AND t.participant_id = d.participant_id AND t.id > d.id"
+        )
+        op.create_index("uq_tickets_event_participant", "tickets", ["event_id", "participant_id"],
+                        unique=True, postgresql_concurrently=True, if_not_exists=True)
+
+    # Короткая транзакция только с DDL: эксклюзивная блокировка держится доли секунды.
+    op.execute(
+        "ALTER TABLE tickets ADD CONSTRAINT uq_tickets_event_participant "
+        "UNIQUE USING INDEX uq_tickets_event_participant"
+    )
+    op.add_column("events", sa.Column("capacity", sa.Integer(), nullable=True))
+    op.add_column("events", sa.Column("tickets_sold", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        "ALTER TABLE events ADD CONSTRAINT ck_events_tickets_sold "
+        "CHECK (tickets_sold >= 0 AND (capacity IS NULL OR tickets_sold <= capacity)) NOT VALID"
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "UPDATE events SET tickets_sold = counts.sold "
+            "FROM (SELECT event_id, count(*) AS sold FROM tickets GROUP BY event_id) AS counts "
+            "WHERE events.id = counts.event_id"
+        )
+        op.execute("ALTER TABLE events VALIDATE CONSTRAINT ck_events_tickets_sold")
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_events_tickets_sold", "events", type_="check")
+    op.drop_column("events", "tickets_sold")
+    op.drop_column("events", "capacity")
+    op.drop_constraint("uq_tickets_event_participant", "tickets", type_="unique")
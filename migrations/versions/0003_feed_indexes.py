@@ -0,0 +1,38 @@
+"""Индексы под предикаты лент и билетов
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+(start_time, id) — ключ пагинации лент /events/active и /events/history,
+(owner_id, start_time) — мероприятия пользователя и блокировка,
+(participant_id) — билеты пользователя. tickets.event_id покрыт
+уникальным индексом (event_id, participant_id).
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_events_start_time_id", "events", ["start_time", "id"],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index("ix_events_owner_id_start_time", "events", ["owner_id", "start_time"],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index("ix_tickets_participant_id", "tickets", ["participant_id"],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_tickets_participant_id", table_name="tickets",
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_events_owner_id_start_time", table_name="events",
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index("ix_events_start_time_id", table_name="events",
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,34 @@
+"""ON DELETE CASCADE для tickets.event_id
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Новый внешний ключ добавляется как NOT VALID и проверяется отдельной
+транзакцией, чтобы не держать блокировку таблицы на время проверки.
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_event_id_fkey")
+    op.execute(
+        "ALTER TABLE tickets ADD CONSTRAINT tickets_event_id_fkey "
+        "FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE NOT VALID"
+    )
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE tickets VALIDATE CONSTRAINT tickets_event_id_fkey")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE tickets DROP CONSTRAINT IF EXISTS tickets_event_id_fkey")
+    op.execute(
+        "ALTER TABLE tickets ADD CONSTRAINT tickets_event_id_fkey "
+        "FOREIGN KEY (event_id) REFERENCES events (id)"
+    )
@@ -0,0 +1,31 @@
+"""GIN-индекс полнотекстового поиска по мероприятиям
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+Индекс по выражению, а не по отдельной колонке: его можно построить
+CONCURRENTLY без перезаписи таблицы. Выражение должно совпадать
+с app.service.search.SEARCH_DOCUMENT.
+"""
+from alembic import op
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_search ON events USING gin "
+            "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || "
+            "coalesce(location, '')))"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_events_search")
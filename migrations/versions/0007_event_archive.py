@@ -0,0 +1,48 @@
+"""Архивные таблицы прошедших мероприятий и билетов
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+Новые таблицы, существующие не затрагиваются. Данные переносит фоновая
+задача archive_events, а не миграция.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "archived_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("location", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("capacity", sa.Integer(), nullable=True),
+        sa.Column("tickets_sold", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_archived_events_start_time_id", "archived_events", ["start_time", "id"])
+    op.create_index("ix_archived_events_owner_id_start_time", "archived_events", ["owner_id", "start_time"])
+
+    op.create_table(
+        "archived_tickets",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("event_id", sa.Integer(), sa.ForeignKey("archived_events.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("participant_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_archived_tickets_event_id", "archived_tickets", ["event_id"])
+    op.create_index("ix_archived_tickets_participant_id", "archived_tickets", ["participant_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("archived_tickets")
+    op.drop_table("archived_events")
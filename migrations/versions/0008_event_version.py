@@ -0,0 +1,30 @@
+"""Версия и время изменения мероприятия для ETag
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+Колонки с постоянным значением по умолчанию (now() вычисляется один раз
+на момент ALTER) добавляются без перезаписи таблицы.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("events", "archived_events"):
+        op.add_column(table, sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+        op.add_column(table, sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False,
+                                       server_default=sa.func.now()))
+
+
+def downgrade() -> None:
+    for table in ("archived_events", "events"):
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "version")